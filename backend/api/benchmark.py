@@ -0,0 +1,341 @@
+"""Сценарии и замеры для команды ``benchmark``.
+
+Запросы выполняются в том же процессе через ``APIClient``, поэтому
+замеры включают весь стек Django и DRF, но не сеть и не WSGI-сервер.
+Прогон идёт в транзакции, которая всегда откатывается (``rolled_back``):
+созданные рецепты, избранное и подписки не остаются в базе, даже если
+сценарий прерван ошибкой или запущен без парного.
+"""
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from itertools import combinations
+
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.utils.cache import bump_cache_version
+from api.utils.short_links import encode_recipe_id
+from recipes.models import Ingredient, Recipe, StoredFile, Tag
+from user.models import CustomUser
+
+# Группы кэша, значения которых могли быть посчитаны по откаченным данным.
+CACHE_GROUPS = ("recipes", "recipe_ids", "tags", "ingredients", "users")
+
+# Прозрачный PNG 1×1.
+IMAGE = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA"
+    "DUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Выполняет блок в транзакции и откатывает её.
+
+    Отложенные ``on_commit`` (задачи обработки изображений, сброс версий
+    кэша) не выполняются; после отката версии групп кэша сбрасываются, а
+    файлы, впервые сохранённые за прогон, удаляются.
+    """
+    started = timezone.now()
+    touched = []
+    try:
+        with transaction.atomic():
+            try:
+                yield
+            finally:
+                # После ошибки БД транзакция не принимает запросов.
+                if not transaction.get_rollback():
+                    touched = list(
+                        StoredFile.objects.filter(
+                            updated_at__gte=started
+                        ).values_list("pk", flat=True)
+                    )
+                transaction.set_rollback(True)
+    finally:
+        existing = set(
+            StoredFile.objects.filter(pk__in=touched).values_list(
+                "pk", flat=True
+            )
+        )
+        for name in set(touched) - existing:
+            default_storage.delete(name)
+        for group in CACHE_GROUPS:
+            bump_cache_version(group)
+
+
+class Scenarios:
+    """Набор сценариев на данных текущей базы.
+
+    Каждый сценарий — ``(имя, клиент, фабрика)``; фабрика по номеру
+    итерации возвращает ``(метод, путь, тело)``.
+    """
+
+    def __init__(self, runs):
+        self.runs = runs
+        self.viewer = (
+            CustomUser.objects.annotate(favorites_total=Count("favorites"))
+            .order_by("-favorites_total", "pk")
+            .first()
+        )
+        self.author = CustomUser.objects.order_by(
+            "-recipes_count", "pk"
+        ).first()
+        if self.viewer is None or not Recipe.objects.exists():
+            raise BenchmarkError(
+                "В базе нет данных; сгенерируйте их командой generate_data."
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+        self.anonymous = APIClient()
+        self.recipe_ids = self.pick(
+            Recipe.objects.order_by("-favorites_count", "pk")
+        )
+        self.fresh_recipe_ids = self.pick(
+            Recipe.objects.exclude(favorited_by__user=self.viewer)
+            .exclude(in_shopping_carts__user=self.viewer)
+            .order_by("pk")
+        )
+        self.fresh_author_ids = self.pick(
+            CustomUser.objects.exclude(pk=self.viewer.pk)
+            .exclude(followers__user=self.viewer)
+            .order_by("pk")
+        )
+        self.tags = list(Tag.objects.values_list("slug", flat=True)[:2])
+        self.ingredient_ids = list(
+            Ingredient.objects.order_by("pk").values_list("pk", flat=True)[:3]
+        )
+        self.ingredient_prefix = Ingredient.objects.order_by("pk").values_list(
+            "name", flat=True
+        )[0][:3]
+        self.created = []
+
+    def pick(self, queryset):
+        ids = list(queryset.values_list("pk", flat=True)[: self.runs])
+        if len(ids) < self.runs:
+            raise BenchmarkError(
+                "Недостаточно данных для пишущих сценариев; "
+                "уменьшите --iterations или увеличьте набор данных."
+            )
+        return ids
+
+    def recipe_filters(self):
+        return {
+            "tags": "&".join(f"tags={slug}" for slug in self.tags),
+            "author": f"author={self.author.pk}",
+            "is_favorited": "is_favorited=1",
+            "is_in_shopping_cart": "is_in_shopping_cart=1",
+            "search": f"search={self.ingredient_prefix}",
+        }
+
+    def build(self):
+        client, anonymous = self.client, self.anonymous
+        scenarios = []
+
+        def add(name, factory, user_client=client):
+            scenarios.append((name, user_client, factory))
+
+        def fixed(method, path, data=None):
+            return lambda i: (method, path, data)
+
+        def get(path):
+            return fixed("get", path)
+
+        def by_id(method, template, ids=None):
+            ids = ids or self.recipe_ids
+            return lambda i: (method, template.format(ids[i]), None)
+
+        filters = self.recipe_filters()
+        for size in range(len(filters) + 1):
+            for names in combinations(filters, size):
+                query = "&".join(filters[name] for name in names)
+                add(
+                    f"recipes:list[{','.join(names)}]",
+                    get(f"/api/recipes/?limit=6&{query}"),
+                )
+        add("recipes:list:anonymous", get("/api/recipes/?limit=6"), anonymous)
+        add("recipes:list:cursor", get("/api/recipes/?pagination=cursor"))
+        add("recipes:retrieve", by_id("get", "/api/recipes/{}/"))
+        add(
+            "recipes:retrieve:anonymous",
+            by_id("get", "/api/recipes/{}/"),
+            anonymous,
+        )
+        add("recipes:get-link", by_id("get", "/api/recipes/{}/get-link/"))
+        add(
+            "recipes:short-link",
+            by_id(
+                "get",
+                "/api/r/{}/",
+                [encode_recipe_id(pk) for pk in self.recipe_ids],
+            ),
+            anonymous,
+        )
+        add("tags:list", get("/api/tags/"))
+        add(
+            "ingredients:autocomplete",
+            get(f"/api/ingredients/?name={self.ingredient_prefix}"),
+        )
+        add("users:list", get("/api/users/?limit=6"))
+        add("users:me", get("/api/users/me/"))
+        add("users:retrieve", get(f"/api/users/{self.author.pk}/"))
+        add(
+            "users:subscriptions",
+            get("/api/users/subscriptions/?limit=6&recipes_limit=3"),
+        )
+        add("favorites:list", get("/api/favorites/"))
+        add("shopping_cart:list", get("/api/shopping_cart/"))
+        add(
+            "recipes:download_shopping_cart",
+            get("/api/recipes/download_shopping_cart/"),
+        )
+
+        recipe = {
+            "ingredients": [
+                {"id": pk, "amount": 10} for pk in self.ingredient_ids
+            ],
+            "tags": list(Tag.objects.values_list("pk", flat=True)[:2]),
+            "image": IMAGE,
+            "name": "Бенчмарк",
+            "text": "Рецепт для замеров.",
+            "cooking_time": 10,
+        }
+        add("recipes:create", fixed("post", "/api/recipes/", recipe))
+        add(
+            "recipes:update",
+            lambda i: (
+                "patch",
+                f"/api/recipes/{self.created_recipe(i)}/",
+                {**recipe, "cooking_time": 20},
+            ),
+        )
+        add(
+            "recipes:delete",
+            lambda i: (
+                "delete",
+                f"/api/recipes/{self.created_recipe(i)}/",
+                None,
+            ),
+        )
+        fresh = self.fresh_recipe_ids
+        for action in ("favorite", "shopping_cart"):
+            path = "/api/recipes/{}/" + action + "/"
+            add(f"recipes:{action}:add", by_id("post", path, fresh))
+            add(f"recipes:{action}:remove", by_id("delete", path, fresh))
+            path = f"/api/recipes/{action}/bulk/"
+            bulk = {"recipes": fresh[:100]}
+            add(f"recipes:{action}:bulk-add", fixed("post", path, bulk))
+            add(f"recipes:{action}:bulk-remove", fixed("delete", path, bulk))
+        subscribe = "/api/users/{}/subscribe/"
+        add("users:subscribe", by_id("post", subscribe, self.fresh_author_ids))
+        add(
+            "users:unsubscribe",
+            by_id("delete", subscribe, self.fresh_author_ids),
+        )
+        return scenarios
+
+    def created_recipe(self, index):
+        if index >= len(self.created):
+            raise BenchmarkError(
+                "Сценарии recipes:update и recipes:delete работают с "
+                "рецептами из recipes:create; запустите их вместе."
+            )
+        return self.created[index]
+
+    def send(self, user_client, method, path, data):
+        """Выполняет запрос целиком: потоковое тело читается, иначе замер
+        не включил бы его генерацию. Дочитанный ответ закрывает обёртка
+        ``APIClient``; повторный ``close()`` закрыл бы соединение с БД
+        посреди транзакции прогона."""
+        response = getattr(user_client, method)(path, data, format="json")
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        if response.status_code >= 400:
+            raise BenchmarkError(
+                f"{method.upper()} {path}: {response.status_code} "
+                f"{getattr(response, 'data', '')}"
+            )
+        if method == "post" and path == "/api/recipes/":
+            self.created.append(response.data["id"])
+        return response
+
+
+def percentile(values, share):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[
+        round(share * 100) - 1
+    ]
+
+
+def measure(scenarios, user_client, factory, iterations, warmup):
+    """Прогоняет сценарий: ``warmup`` разогревочных итераций,
+    ``iterations`` замеров времени и запросов и одну итерацию под
+    ``tracemalloc`` для пика выделенной памяти."""
+    for i in range(warmup):
+        scenarios.send(user_client, *factory(i))
+    timings, queries = [], []
+    for i in range(warmup, warmup + iterations):
+        request = factory(i)
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            scenarios.send(user_client, *request)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+    tracemalloc.start()
+    try:
+        scenarios.send(user_client, *factory(warmup + iterations))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(percentile(timings, 0.95), 2),
+        "queries": max(queries),
+        "memory_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, latency_tolerance, memory_tolerance):
+    """Список регрессий относительно базовых замеров.
+
+    Число запросов не должно расти вовсе; время и память — не больше
+    заданной доли с небольшим абсолютным запасом на шум.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: запросов {current['queries']} "
+                f"(было {base['queries']})"
+            )
+        if (
+            current["p95_ms"] > base["p95_ms"] * latency_tolerance
+            and current["p95_ms"] - base["p95_ms"] > 2
+        ):
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']} мс "
+                f"(было {base['p95_ms']} мс)"
+            )
+        if (
+            current["memory_kb"] > base["memory_kb"] * memory_tolerance
+            and current["memory_kb"] - base["memory_kb"] > 64
+        ):
+            regressions.append(
+                f"{name}: память {current['memory_kb']} КБ "
+                f"(было {base['memory_kb']} КБ)"
+            )
+    return regressions
@@ -1,3 +1,9 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, Q
 from django_filters.rest_framework import FilterSet, filters
 
 from recipes.models import Ingredient, Recipe, Tag
@@ -14,6 +20,7 @@ class RecipeFilter(FilterSet):
         method="filter_by_user_relation"
     )
     is_favorited = filters.BooleanFilter(method="filter_by_user_relation")
+    search = filters.CharFilter(method="filter_search")
 
     def filter_by_user_relation(self, queryset, name, value):
         user = self.request.user
@@ -32,9 +39,32 @@ class RecipeFilter(FilterSet):
             return queryset.filter(**{field_name: user})
         return queryset.exclude(**{field_name: user})
 
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию с учётом опечаток."""
+        value = value.strip()
+        if not value:
+            return queryset
+        query = SearchQuery(value, config="russian", search_type="websearch")
+        return (
+            queryset.filter(
+                Q(search_vector=query) | Q(name__trigram_word_similar=value)
+            )
+            .annotate(
+                search_rank=SearchRank(F("search_vector"), query)
+                + TrigramWordSimilarity(value, "name")
+            )
+            .order_by("-search_rank", "-pub_date")
+        )
+
     class Meta:
         model = Recipe
-        fields = ["tags", "author", "is_in_shopping_cart", "is_favorited"]
+        fields = [
+            "tags",
+            "author",
+            "is_in_shopping_cart",
+            "is_favorited",
+            "search",
+        ]
 
 
 class IngredientFilter(FilterSet):
@@ -0,0 +1,346 @@
+"""Нагрузочный генератор по коллекции Postman для команды ``loadtest``.
+
+Каждый виртуальный пользователь один раз проходит подготовительные
+папки коллекции (регистрация, токены, справочники, рецепты), а затем
+до конца прогона выполняет верхнеуровневые папки, выбирая их случайно
+с заданными весами. Переменные коллекции, которые в Postman задают
+тестовые скрипты (``pm.collectionVariables.set``), извлекаются из
+ответов по тем же выражениям.
+"""
+import asyncio
+import json
+import random
+import re
+import ssl
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+STATUS_BY_PHRASE = {status.phrase: status.value for status in HTTPStatus}
+
+VARIABLE = re.compile(r"{{(\w+)}}")
+EXPECTED_STATUS = re.compile(
+    r"pm\.response\.status,.*?\)\.to\.be\.eql\(\"([^\"]+)\"\)", re.S
+)
+DEFINITION = re.compile(
+    r"(?:const|let|var)\s+(\w+)\s*=\s*_\.get\(responseData,\s*\"([\w.]+)\"\)"
+)
+ASSIGNMENT = re.compile(
+    r"pm\.collectionVariables\.set\(\s*[\"'](\w+)[\"']\s*,\s*(.+?)\)\s*;?\s*$",
+    re.M,
+)
+RESPONSE_PATH = re.compile(
+    r"responseData((?:\[\d+\]|\.\w+)*?)(?:\.slice\((\d+),\s*(\d+)\))?$"
+)
+
+
+class Step:
+    """Запрос коллекции с ожидаемым статусом и правилами извлечения
+    переменных из ответа."""
+
+    def __init__(self, item, auth):
+        request = item["request"]
+        self.name = item["name"]
+        self.method = request["method"]
+        url = request["url"]
+        self.url = url["raw"] if isinstance(url, dict) else url
+        body = request.get("body") or {}
+        self.body = body.get("raw") if body.get("mode") == "raw" else None
+        self.auth = request.get("auth", auth)
+        script = "\n".join(
+            line
+            for event in item.get("event", [])
+            if event["listen"] == "test"
+            for line in event["script"]["exec"]
+        )
+        expected = EXPECTED_STATUS.search(script)
+        self.expected_status = (
+            STATUS_BY_PHRASE.get(expected.group(1)) if expected else None
+        )
+        definitions = dict(DEFINITION.findall(script))
+        self.extract = {}
+        for variable, expression in ASSIGNMENT.findall(script):
+            expression = expression.strip()
+            if expression in definitions:
+                expression = f"responseData.{definitions[expression]}"
+            match = RESPONSE_PATH.match(expression)
+            if match:
+                self.extract[variable] = match.groups()
+
+    def headers(self, variables):
+        headers = {"Content-Type": "application/json"}
+        if self.auth and self.auth.get("type") == "apikey":
+            options = {
+                option["key"]: option["value"]
+                for option in self.auth["apikey"]
+            }
+            headers[options["key"]] = substitute(options["value"], variables)
+        return headers
+
+    def extract_variables(self, data, variables):
+        for variable, (path, start, end) in self.extract.items():
+            value = data
+            try:
+                for key in re.findall(r"\[(\d+)\]|\.(\w+)", path):
+                    value = value[int(key[0])] if key[0] else value[key[1]]
+            except (KeyError, IndexError, TypeError):
+                continue
+            if start is not None:
+                value = value[int(start):int(end)]
+            variables[variable] = value if start is not None else str(value)
+
+
+def substitute(text, variables):
+    return VARIABLE.sub(
+        lambda match: str(variables.get(match.group(1), match.group(0))), text
+    )
+
+
+def load_collection(path, include_bad_requests=False):
+    """Возвращает переменные коллекции и шаги верхнеуровневых папок."""
+    with open(path, encoding="utf-8") as file:
+        collection = json.load(file)
+
+    def walk(items, auth):
+        steps = []
+        for item in items:
+            if not include_bad_requests and "bad_request" in item["name"]:
+                continue
+            if "item" in item:
+                steps.extend(walk(item["item"], item.get("auth", auth)))
+            else:
+                steps.append(Step(item, auth))
+        return steps
+
+    variables = {
+        variable["key"]: variable["value"]
+        for variable in collection.get("variable", [])
+    }
+    folders = {
+        folder["name"]: walk(folder["item"], folder.get("auth"))
+        for folder in collection["item"]
+        if "item" in folder
+    }
+    return variables, folders
+
+
+def personalise(variables, tag):
+    """Делает адреса и имена пользователей уникальными для каждого
+    виртуального пользователя, чтобы регистрации не конфликтовали."""
+    variables = dict(variables)
+    for key, value in variables.items():
+        lowered = key.lower()
+        if key.startswith("tooLong") or not value.startswith('"'):
+            continue
+        if "email" in lowered:
+            local, domain = value.strip('"').split("@", 1)
+            variables[key] = f'"{local}.{tag}@{domain}"'
+        elif "username" in lowered:
+            variables[key] = f'"{value.strip(chr(34))}.{tag}"'
+    return variables
+
+
+class HttpConnection:
+    """Минимальный клиент HTTP/1.1 с keep-alive поверх asyncio."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = (
+            ssl.create_default_context() if parts.scheme == "https" else None
+        )
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, method, path, headers, body):
+        try:
+            return await asyncio.wait_for(
+                self.exchange(method, path, headers, body), self.timeout
+            )
+        except BaseException:
+            await self.close()
+            raise
+
+    async def exchange(self, method, path, headers, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl
+            )
+        payload = body.encode() if body else b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}"]
+        lines += [f"{key}: {value}" for key, value in headers.items()]
+        lines.append(f"Content-Length: {len(payload)}")
+        self.writer.write("\r\n".join(lines).encode() + b"\r\n\r\n" + payload)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        response_headers = {}
+        while True:
+            line = (await self.reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            key, _, value = line.partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+        if response_headers.get("transfer-encoding") == "chunked":
+            content = bytearray()
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                content += await self.reader.readexactly(size)
+                await self.reader.readline()
+        elif "content-length" in response_headers:
+            content = await self.reader.readexactly(
+                int(response_headers["content-length"])
+            )
+        else:
+            content = await self.reader.read()
+            await self.close()
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, response_headers, bytes(content)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.unexpected = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def record(self, name, elapsed_ms, status, expected):
+        self.latencies[name].append(elapsed_ms)
+        if status is None or status >= 500:
+            self.errors[name] += 1
+        elif expected is not None and status != expected:
+            self.unexpected[name] += 1
+
+    def summary(self, elapsed):
+        """Сводка по каждому запросу: пропускная способность, доля ошибок
+        (5xx, таймауты, обрывы), доля неожиданных статусов, перцентили
+        и гистограмма времени ответа."""
+        report = {}
+        for name, latencies in sorted(self.latencies.items()):
+            ordered = sorted(latencies)
+            histogram = {}
+            for bound in HISTOGRAM_BUCKETS_MS:
+                histogram[f"<={bound}"] = sum(
+                    1 for value in ordered if value <= bound
+                ) - sum(histogram.values())
+            histogram[f">{HISTOGRAM_BUCKETS_MS[-1]}"] = len(ordered) - sum(
+                histogram.values()
+            )
+            report[name] = {
+                "requests": len(ordered),
+                "rps": round(len(ordered) / elapsed, 2),
+                "error_rate": round(self.errors[name] / len(ordered), 4),
+                "unexpected_rate": round(
+                    self.unexpected[name] / len(ordered), 4
+                ),
+                "p50_ms": round(statistics.median(ordered), 2),
+                "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 2)
+                if len(ordered) > 1
+                else round(ordered[0], 2),
+                "p99_ms": round(ordered[int(len(ordered) * 0.99) - 1], 2)
+                if len(ordered) > 1
+                else round(ordered[0], 2),
+                "histogram_ms": histogram,
+            }
+        return report
+
+
+class LoadTest:
+    def __init__(
+        self,
+        collection,
+        base_url,
+        users,
+        duration,
+        setup,
+        weights,
+        ramp_up=0,
+        think_time=0,
+        timeout=30,
+        include_bad_requests=False,
+        seed=None,
+    ):
+        self.variables, self.folders = load_collection(
+            collection, include_bad_requests
+        )
+        unknown = (set(setup) | set(weights)) - set(self.folders)
+        if unknown:
+            raise ValueError(f"Нет таких папок: {', '.join(sorted(unknown))}")
+        self.base_url = base_url.rstrip("/")
+        self.users = users
+        self.duration = duration
+        self.setup = setup
+        self.scenarios = [
+            name
+            for name in self.folders
+            if name not in setup and weights.get(name, 1) > 0
+        ]
+        self.weights = [weights.get(name, 1) for name in self.scenarios]
+        self.ramp_up = ramp_up
+        self.think_time = think_time
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:6]
+        self.stats = Stats()
+
+    async def send(self, connection, step, variables):
+        url = substitute(step.url, {**variables, "baseUrl": ""})
+        body = substitute(step.body, variables) if step.body else None
+        started = time.perf_counter()
+        try:
+            status, headers, content = await connection.request(
+                step.method, url, step.headers(variables), body
+            )
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+            status = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats.record(step.name, elapsed_ms, status, step.expected_status)
+        if status is not None and step.extract and content:
+            try:
+                step.extract_variables(json.loads(content), variables)
+            except ValueError:
+                pass
+        if self.think_time:
+            await asyncio.sleep(self.think_time)
+
+    async def virtual_user(self, number, deadline):
+        await asyncio.sleep(self.ramp_up * number / max(1, self.users))
+        connection = HttpConnection(self.base_url, self.timeout)
+        variables = personalise(self.variables, f"{self.run_id}-{number}")
+        try:
+            for folder in self.setup:
+                for step in self.folders[folder]:
+                    await self.send(connection, step, variables)
+            while time.monotonic() < deadline and self.scenarios:
+                folder = self.random.choices(self.scenarios, self.weights)[0]
+                for step in self.folders[folder]:
+                    if time.monotonic() >= deadline:
+                        break
+                    await self.send(connection, step, variables)
+        finally:
+            await connection.close()
+
+    async def run(self):
+        started = time.monotonic()
+        deadline = started + self.ramp_up + self.duration
+        await asyncio.gather(
+            *(
+                self.virtual_user(number, deadline)
+                for number in range(self.users)
+            )
+        )
+        elapsed = time.monotonic() - started
+        return elapsed, self.stats.summary(elapsed)
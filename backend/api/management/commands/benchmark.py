@@ -0,0 +1,130 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from api.benchmark import (
+    BenchmarkError,
+    Scenarios,
+    compare,
+    measure,
+    rolled_back,
+)
+from recipes.models import Recipe
+from user.models import CustomUser
+
+DEFAULT_BASELINE = settings.BASE_DIR / "benchmark_baseline.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет p50/p95 времени ответа, число запросов к БД и пик памяти "
+        "для маршрутов API и сравнивает их с сохранёнными базовыми."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--only",
+            help="Запускать только сценарии, в имени которых есть строка.",
+        )
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Сохранить результаты как базовые вместо сравнения.",
+        )
+        parser.add_argument("--output", help="Записать результаты в JSON.")
+        parser.add_argument(
+            "--latency-tolerance",
+            type=float,
+            default=1.25,
+            help="Допустимый рост p95 (доля от базового).",
+        )
+        parser.add_argument(
+            "--memory-tolerance",
+            type=float,
+            default=1.5,
+            help="Допустимый рост пика памяти (доля от базового).",
+        )
+
+    def handle(self, *args, **options):
+        iterations = max(2, options["iterations"])
+        warmup = max(0, options["warmup"])
+        results = {}
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ):
+            try:
+                with rolled_back():
+                    scenarios = Scenarios(runs=warmup + iterations + 1)
+                    for name, client, factory in scenarios.build():
+                        if options["only"] and options["only"] not in name:
+                            continue
+                        results[name] = measure(
+                            scenarios, client, factory, iterations, warmup
+                        )
+                        self.report(name, results[name])
+            except BenchmarkError as error:
+                raise CommandError(str(error))
+        report = {
+            "environment": {
+                "vendor": connection.vendor,
+                "users": CustomUser.objects.count(),
+                "recipes": Recipe.objects.count(),
+                "iterations": iterations,
+            },
+            "results": results,
+        }
+        if options["output"]:
+            self.write(options["output"], report)
+        if options["save_baseline"]:
+            self.write(options["baseline"], report)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Базовые замеры сохранены: {options['baseline']}"
+                )
+            )
+            return
+        try:
+            with open(options["baseline"], encoding="utf-8") as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            self.stdout.write(
+                "Базовых замеров нет; сохраните их с --save-baseline."
+            )
+            return
+        if baseline["environment"] != report["environment"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Окружение отличается от базового: "
+                    f"{baseline['environment']}"
+                )
+            )
+        regressions = compare(
+            results,
+            baseline["results"],
+            options["latency_tolerance"],
+            options["memory_tolerance"],
+        )
+        if regressions:
+            raise CommandError(
+                "Регрессии производительности:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("Регрессий нет."))
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<60} p50 {result['p50_ms']:>8.2f} мс  "
+            f"p95 {result['p95_ms']:>8.2f} мс  "
+            f"запросов {result['queries']:>3}  "
+            f"память {result['memory_kb']:>9.1f} КБ"
+        )
+
+    @staticmethod
+    def write(path, report):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadtest import LoadTest
+
+SETUP_FOLDERS = (
+    "register_and_get_tokens // No Auth",
+    "tags",
+    "ingredients",
+    "recipes",
+)
+
+
+def weight(value):
+    name, _, number = value.rpartition("=")
+    try:
+        return name, float(number)
+    except ValueError:
+        raise ValueError(f"Ожидается «папка=вес»: {value}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Воспроизводит коллекцию Postman как взвешенную нагрузку от "
+        "множества виртуальных пользователей и выводит пропускную "
+        "способность, долю ошибок и гистограммы задержек по запросам."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--collection",
+            default=str(
+                settings.BASE_DIR.parent
+                / "postman_collection"
+                / "foodgram.postman_collection.json"
+            ),
+        )
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument(
+            "--duration", type=float, default=60, help="Секунды."
+        )
+        parser.add_argument(
+            "--ramp-up",
+            type=float,
+            default=0,
+            help="За сколько секунд подключаются все пользователи.",
+        )
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=0,
+            help="Пауза между запросами одного пользователя, секунды.",
+        )
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument(
+            "--setup",
+            nargs="*",
+            default=list(SETUP_FOLDERS),
+            help="Папки, которые пользователь проходит один раз в начале.",
+        )
+        parser.add_argument(
+            "--weight",
+            type=weight,
+            action="append",
+            default=[],
+            help="Вес сценария: «папка=вес»; 0 исключает папку.",
+        )
+        parser.add_argument(
+            "--include-bad-requests",
+            action="store_true",
+            help="Выполнять и запросы с заведомо неверными данными.",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--output", help="Сохранить отчёт в JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            load_test = LoadTest(
+                options["collection"],
+                options["base_url"],
+                users=options["users"],
+                duration=options["duration"],
+                setup=options["setup"],
+                weights=dict(options["weight"]),
+                ramp_up=options["ramp_up"],
+                think_time=options["think_time"],
+                timeout=options["timeout"],
+                include_bad_requests=options["include_bad_requests"],
+                seed=options["seed"],
+            )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        elapsed, report = asyncio.run(load_test.run())
+
+        total = sum(row["requests"] for row in report.values())
+        errors = sum(
+            row["requests"] * row["error_rate"] for row in report.values()
+        )
+        width = max(map(len, report), default=10)
+        self.stdout.write(
+            f"{'запрос':<{width}} {'всего':>7} {'rps':>8} {'ошибки':>7} "
+            f"{'неожид.':>7} {'p50':>8} {'p95':>8} {'p99':>8}"
+        )
+        for name, row in report.items():
+            line = (
+                f"{name:<{width}} {row['requests']:>7} {row['rps']:>8} "
+                f"{row['error_rate']:>7.1%} {row['unexpected_rate']:>7.1%} "
+                f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}"
+            )
+            self.stdout.write(
+                self.style.ERROR(line) if row["error_rate"] else line
+            )
+        self.stdout.write(
+            f"Всего: {total} запросов за {elapsed:.1f} с "
+            f"({total / elapsed:.1f} в секунду), "
+            f"ошибок: {errors / total if total else 0:.2%}"
+        )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(
+                    {
+                        "elapsed_s": round(elapsed, 2),
+                        "users": options["users"],
+                        "requests": report,
+                    },
+                    file,
+                    ensure_ascii=False,
+                    indent=2,
+                )
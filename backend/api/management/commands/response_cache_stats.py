@@ -0,0 +1,36 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from api.utils.response_cache import reset_stats, response_cache, stats
+from api.views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+CACHED_VIEWSETS = (RecipeViewSet, TagViewSet, IngredientViewSet)
+
+
+class Command(BaseCommand):
+    help = "Попадания и промахи кэша ответов анонимным пользователям."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Обнулить счётчики."
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(response_cache(), LocMemCache):
+            self.stdout.write(
+                self.style.WARNING(
+                    "Кэш ответов в памяти процесса (CACHE_BACKEND=locmem): "
+                    "счётчики веб-сервера этой команде не видны."
+                )
+            )
+        names = [viewset.response_cache_name for viewset in CACHED_VIEWSETS]
+        for name, counts in stats(names).items():
+            total = counts["hit"] + counts["miss"]
+            ratio = counts["hit"] / total if total else 0
+            self.stdout.write(
+                f"{name}: попаданий {counts['hit']}, "
+                f"промахов {counts['miss']} ({ratio:.1%})"
+            )
+        if options["reset"]:
+            reset_stats(names)
+            self.stdout.write("Счётчики обнулены.")
@@ -1,30 +1,128 @@
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
 
+from api.serializers import RecipeIdsSerializer
+from api.utils.response_cache import record, response_cache, response_cache_key
+from recipes.models import Recipe
+from recipes.relations import (
+    add_relation,
+    add_relations,
+    remove_relation,
+    remove_relations,
+)
+
+
+def parse_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise Http404
+
+
+class CursorPaginationMixin:
+    """Курсорная пагинация по запросу клиента.
+
+    По умолчанию используется ``pagination_class``; клиент переходит на
+    курсоры параметром ``?pagination=cursor``, дальше — по ссылкам
+    ``next``/``previous`` с параметром ``cursor``. Курсоры идут по
+    убыванию id; поиск с ними не сочетается (ответ 400), так как его
+    порядок — по релевантности.
+    """
+
+    cursor_pagination_classes = {}
+
+    def uses_cursor_pagination(self):
+        params = self.request.query_params
+        return "cursor" in params or params.get("pagination") == "cursor"
+
+    @property
+    def paginator(self):
+        cursor_pagination_class = self.cursor_pagination_classes.get(
+            self.action
+        )
+        if (
+            not hasattr(self, "_paginator")
+            and cursor_pagination_class is not None
+            and self.uses_cursor_pagination()
+        ):
+            self._paginator = cursor_pagination_class()
+        return super().paginator
+
+
+class AnonymousResponseCacheMixin:
+    """Кэширует ``list`` и ``retrieve`` для анонимных пользователей.
+
+    В ключ входят параметры фильтра и ``response_cache_params``; ответ
+    устаревает, как только меняется версия любой из групп
+    ``response_cache_versions``. Заголовок ``X-Cache`` показывает,
+    откуда взят ответ.
+    """
+
+    response_cache_name = None
+    response_cache_versions = ()
+    response_cache_params = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        allowed = set(self.response_cache_params)
+        filterset_class = getattr(self, "filterset_class", None)
+        if filterset_class is not None:
+            allowed.update(filterset_class.base_filters)
+        key = response_cache_key(
+            self.response_cache_name,
+            self.response_cache_versions,
+            request,
+            allowed,
+        )
+        cache = response_cache()
+        data = cache.get(key)
+        if data is not None:
+            record(self.response_cache_name, "hit")
+            return Response(data, headers={"X-Cache": "HIT"})
+        record(self.response_cache_name, "miss")
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+            response["X-Cache"] = "MISS"
+        return response
+
 
 class RecipeActionMixin:
     def perform_action(
         self, request, pk, model, serializer_class, error_message
     ):
-        recipe = self.get_object()
+        recipe_id = parse_pk(pk)
         user = request.user
-        queryset = model.objects.filter(user=user, recipe=recipe)
-        exists = queryset.exists()
 
         if request.method == "POST":
-            if exists:
+            if not add_relation(model, user.pk, "recipe", recipe_id):
+                get_object_or_404(Recipe.objects.only("id"), pk=recipe_id)
                 return Response(
                     {"errors": error_message},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            model.objects.create(user=user, recipe=recipe)
+            recipe = Recipe.objects.only(
+                "id", "name", "image", "image_variants", "cooking_time"
+            ).get(pk=recipe_id)
             serializer = serializer_class(
                 recipe, context={"request": request}
             )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         elif request.method == "DELETE":
-            if not exists:
+            if not remove_relation(model, user.pk, "recipe", recipe_id):
+                get_object_or_404(Recipe.objects.only("id"), pk=recipe_id)
                 return Response(
                     {
                         "errors": (
@@ -33,5 +131,42 @@ class RecipeActionMixin:
                     },
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            queryset.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def perform_bulk_action(self, request, model):
+        """Добавляет или удаляет сразу несколько рецептов.
+
+        Для каждого id в ответе указан статус: ``added``/``exists`` при
+        добавлении, ``removed``/``absent`` при удалении или ``not_found``.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data["recipes"]
+        if request.method == "POST":
+            changed = add_relations(
+                model, request.user.pk, "recipe", recipe_ids
+            )
+            statuses = ("added", "exists")
+        else:
+            changed = remove_relations(
+                model, request.user.pk, "recipe", recipe_ids
+            )
+            statuses = ("removed", "absent")
+        unchanged = set(recipe_ids) - changed
+        existing = set()
+        if unchanged:
+            existing = set(
+                Recipe.objects.filter(pk__in=unchanged).values_list(
+                    "pk", flat=True
+                )
+            )
+        results = []
+        for recipe_id in recipe_ids:
+            if recipe_id in changed:
+                result = statuses[0]
+            elif recipe_id in existing:
+                result = statuses[1]
+            else:
+                result = "not_found"
+            results.append({"id": recipe_id, "status": result})
+        return Response({"results": results}, status=status.HTTP_200_OK)
@@ -1,6 +1,123 @@
-from rest_framework.pagination import PageNumberPagination
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+from api.utils.cache import get_cache_version
+
+EXACT_COUNT_LIMIT = 1000
+ESTIMATED_COUNT_MIN = 100000
+COUNT_CACHE_TIMEOUT = 60 * 10
+
+
+class CountingPaginator(Paginator):
+    """Paginator, который не считает большие выборки на каждый запрос.
+
+    Небольшие выборки считаются точно, результат для остальных берётся
+    из кэша по ключу фильтра, а для нефильтрованной таблицы в PostgreSQL
+    используется оценка планировщика.
+    """
+
+    def __init__(self, object_list, per_page, cache_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate_count()
+        if estimate is not None and estimate >= ESTIMATED_COUNT_MIN:
+            self.count_is_approximate = True
+            return estimate
+        if self.cache_key is not None:
+            count = cache.get(self.cache_key)
+            if count is not None:
+                return count
+        queryset = self.object_list.order_by()
+        count = queryset[: EXACT_COUNT_LIMIT + 1].count()
+        if count > EXACT_COUNT_LIMIT:
+            count = queryset.count()
+        if self.cache_key is not None:
+            cache.set(self.cache_key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def estimate_count(self):
+        query = self.object_list.query
+        connection = connections[self.object_list.db]
+        if connection.vendor != "postgresql" or query.has_filters():
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class "
+                "WHERE oid = %s::regclass",
+                [self.object_list.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row and row[0] > 0 else None
 
 
 class CustomLimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = 6
+    count_cache_version = None
+    count_cache_skip_params = ()
+
+    def django_paginator_class(self, queryset, page_size):
+        return CountingPaginator(
+            queryset, page_size, cache_key=self.get_count_cache_key()
+        )
+
+    def get_count_cache_key(self):
+        if self.count_cache_version is None:
+            return None
+        params = self.request.query_params
+        if any(param in params for param in self.count_cache_skip_params):
+            return None
+        signature = "&".join(
+            f"{key}={','.join(sorted(params.getlist(key)))}"
+            for key in sorted(params)
+            if key not in (self.page_query_param, self.page_size_query_param)
+        )
+        version = get_cache_version(self.count_cache_version)
+        return f"count:{self.request.path}:{version}:{signature}"
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_approximate': self.page.paginator.count_is_approximate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class RecipeLimitPagination(CustomLimitPagination):
+    count_cache_version = 'recipes'
+    count_cache_skip_params = ('is_favorited', 'is_in_shopping_cart')
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    page_size = 6
+    # Ключ курсора должен быть непустым и уникальным: pub_date может быть
+    # NULL, а id растёт вместе с ним (auto_now_add).
+    ordering = ('-id',)
+    # Параметры со своим порядком выдачи, который курсор не сохранит.
+    unsupported_params = ('search',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        for param in self.unsupported_params:
+            if request.query_params.get(param):
+                raise ValidationError({
+                    param: 'Не поддерживается с pagination=cursor: '
+                           'результаты упорядочены по релевантности.'
+                })
+        return super().paginate_queryset(queryset, request, view)
+
+
+class SubscriptionCursorPagination(RecipeCursorPagination):
+    ordering = '-subscription_id'
+    unsupported_params = ()
@@ -0,0 +1,27 @@
+from rest_framework.renderers import BaseRenderer
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Формат списка покупок для согласования содержимого.
+
+    Выбирается по ``?format=`` или заголовку ``Accept``; сам файл
+    пишется представлением потоком, мимо ``render``.
+    """
+
+    charset = "utf-8"
+
+
+class TxtRenderer(ShoppingListRenderer):
+    media_type = "text/plain"
+    format = "txt"
+
+
+class CsvRenderer(ShoppingListRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class PdfRenderer(ShoppingListRenderer):
+    media_type = "application/pdf"
+    format = "pdf"
+    charset = None
@@ -1,22 +1,164 @@
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import models, transaction
+from django.utils import timezone
 from djoser.serializers import UserCreateSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from api.utils.viewer import get_viewer
 from recipes.models import (
     Favorite,
     Ingredient,
     IngredientInRecipe,
     Recipe,
     ShoppingCart,
+    ShoppingListItem,
     Subscription,
     Tag,
+    Upload,
 )
+from recipes.shopping_lists import change_recipe_ingredients
 from user.models import CustomUser
 
 
+class ViewerListSerializer(serializers.ListSerializer):
+    """Передаёт id объектов страницы в контекст текущего пользователя."""
+
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        data = list(data)
+        request = self.context.get("request")
+        if request is not None:
+            self.child.prime_viewer(get_viewer(request), data)
+        return super().to_representation(data)
+
+
+def get_variant_urls(instance, image_field, request=None):
+    """URL готовых копий изображения: ``{размер: {формат: url}}``."""
+    image = getattr(instance, image_field)
+    variants = getattr(instance, f"{image_field}_variants") or {}
+    if not image or variants.get("source") != image.name:
+        return {}
+    urls = {}
+    for size, formats in variants["sizes"].items():
+        urls[size] = {}
+        for extension, name in formats.items():
+            url = image.storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[size][extension] = url
+    return urls
+
+
+class ImageVariantsField(serializers.Field):
+    """URL уменьшенных копий изображения: ``{размер: {формат: url}}``.
+
+    Пока фоновая обработка не завершена, возвращает пустой словарь.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return get_variant_urls(
+            instance, self.image_field, self.context.get("request")
+        )
+
+
+class ImageSrcsetField(ImageVariantsField):
+    """Значение атрибута ``srcset`` по уменьшенным копиям в формате WebP.
+
+    Дескриптор — настоящая ширина копии: у узкого изображения копии
+    больших размеров совпадают с ним и попадают в ``srcset`` один раз.
+    Пока копий нет, возвращает пустую строку.
+    """
+
+    def __init__(self, image_field, extension="webp", **kwargs):
+        self.extension = extension
+        super().__init__(image_field, **kwargs)
+
+    def to_representation(self, instance):
+        urls = super().to_representation(instance)
+        variants = getattr(instance, f"{self.image_field}_variants") or {}
+        widths = variants.get("widths", {})
+        candidates = {}
+        for size in sorted((size for size in urls if size.isdigit()), key=int):
+            candidates.setdefault(
+                widths.get(size, int(size)), urls[size][self.extension]
+            )
+        return ", ".join(
+            f"{url} {width}w" for width, url in candidates.items()
+        )
+
+
+class UploadedImageField(Base64ImageField):
+    """Изображение в base64, файлом multipart или токеном загрузки.
+
+    Токен выдаёт ``POST /api/uploads/``: файл уже лежит в хранилище,
+    и запрос не передаёт его содержимое повторно. Поле ссылается на тот
+    же файл по имени, без чтения и записи копии; после обработки
+    изображение заменяется очищенной копией в каталоге поля.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            return serializers.ImageField.to_internal_value(self, data)
+        if isinstance(data, str):
+            try:
+                token = uuid.UUID(data)
+            except ValueError:
+                pass
+            else:
+                return self.get_uploaded_file(token)
+        return super().to_internal_value(data)
+
+    def get_uploaded_file(self, token):
+        upload = (
+            Upload.objects.filter(
+                token=token,
+                user_id=self.context["request"].user.pk,
+                created_at__gte=timezone.now() - Upload.TTL,
+            )
+            .only("file")
+            .first()
+        )
+        if upload is None:
+            raise serializers.ValidationError(
+                "Загрузка не найдена или устарела."
+            )
+        return upload.file.name
+
+
+class UploadSerializer(serializers.ModelSerializer):
+    file = serializers.ImageField(write_only=True)
+
+    class Meta:
+        model = Upload
+        fields = ("token", "file", "created_at")
+        read_only_fields = ("token", "created_at")
+
+    def validate_file(self, value):
+        if value.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError("Файл слишком большой.")
+        return value
+
+    def create(self, validated_data):
+        validated_data["user"] = self.context["request"].user
+        return super().create(validated_data)
+
+
 class CustomUserBaseSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
-    avatar = Base64ImageField(required=False, allow_null=True)
+    avatar = UploadedImageField(required=False, allow_null=True)
+    avatar_variants = ImageVariantsField("avatar")
+    avatar_srcset = ImageSrcsetField("avatar")
 
     class Meta:
         model = CustomUser
@@ -28,21 +170,26 @@ class CustomUserBaseSerializer(serializers.ModelSerializer):
             "email",
             "is_subscribed",
             "avatar",
+            "avatar_variants",
+            "avatar_srcset",
         )
+        list_serializer_class = ViewerListSerializer
+
+    def prime_viewer(self, viewer, users):
+        viewer.prime(authors=[user.pk for user in users])
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Subscription.objects.filter(
-                user=request.user,
-                author=obj,
-            ).exists()
-        return False
+        if request is None:
+            return False
+        return get_viewer(request).is_subscribed(obj.pk)
 
 
 class CustomUserWithRecipesSerializer(CustomUserBaseSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta(CustomUserBaseSerializer.Meta):
         fields = CustomUserBaseSerializer.Meta.fields + (
@@ -50,16 +197,23 @@ class CustomUserWithRecipesSerializer(CustomUserBaseSerializer):
             "recipes_count",
         )
 
-    def get_recipes(self, obj):
-        request = self.context.get("request")
-        recipes = obj.recipes.all().order_by("-pub_date")
-        limit = request.query_params.get("recipes_limit")
+    @staticmethod
+    def parse_recipes_limit(request):
+        limit = request.query_params.get("recipes_limit") if request else None
         if limit and limit.isdigit():
-            recipes = recipes[: int(limit)]
-        return RecipeMiniSerializer(recipes, many=True).data
+            return int(limit)
+        return None
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+    def get_recipes(self, obj):
+        recipes = getattr(obj, "preview_recipes", None)
+        if recipes is None:
+            recipes = obj.recipes.order_by("-pub_date", "-id")
+            limit = self.parse_recipes_limit(self.context.get("request"))
+            if limit is not None:
+                recipes = recipes[:limit]
+        return RecipeMiniSerializer(
+            recipes, many=True, context=self.context
+        ).data
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -110,6 +264,18 @@ class IngredientInRecipeReadSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit", "amount")
 
 
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source="ingredient_id")
+    name = serializers.ReadOnlyField(source="ingredient.name")
+    measurement_unit = serializers.ReadOnlyField(
+        source="ingredient.measurement_unit"
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ("id", "name", "measurement_unit", "amount")
+
+
 class IngredientInRecipeWriteSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField()
     amount = serializers.IntegerField(min_value=1)
@@ -129,6 +295,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField("image")
+    image_srcset = ImageSrcsetField("image")
 
     class Meta:
         model = Recipe
@@ -141,24 +309,34 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_variants",
+            "image_srcset",
             "text",
             "cooking_time",
         )
+        list_serializer_class = ViewerListSerializer
+
+    def prime_viewer(self, viewer, recipes):
+        viewer.prime(
+            recipes=[recipe.pk for recipe in recipes],
+            authors=[recipe.author_id for recipe in recipes],
+        )
 
     def get_is_favorited(self, obj):
-        user = self.context.get("request").user
-        if user.is_anonymous:
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
+        request = self.context.get("request")
+        if request is None:
             return False
-        return obj.favorited_by.filter(user=user).exists()
+        return get_viewer(request).is_favorited(obj.pk)
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
         request = self.context.get("request")
-        if request is None or request.user.is_anonymous:
+        if request is None:
             return False
-        return ShoppingCart.objects.filter(
-            user=request.user,
-            recipe=obj,
-        ).exists()
+        return get_viewer(request).is_in_shopping_cart(obj.pk)
 
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
@@ -167,7 +345,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         queryset=Tag.objects.all(),
         many=True,
     )
-    image = Base64ImageField()
+    image = UploadedImageField()
 
     class Meta:
         model = Recipe
@@ -193,6 +371,22 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
                     "Ингредиенты не должны повторяться."
                 )
             unique_ingredients.add(item["id"])
+        # Индекс в памяти может отставать от справочника, поэтому
+        # проверка идёт по базе: один запрос на все id.
+        missing = unique_ingredients - set(
+            Ingredient.objects.filter(
+                id__in=unique_ingredients
+            ).values_list("id", flat=True)
+        )
+        if missing:
+            raise serializers.ValidationError(
+                [
+                    {"id": ["Ингредиент не найден."]}
+                    if item["id"] in missing
+                    else {}
+                    for item in value
+                ]
+            )
         return value
 
     def validate_tags(self, value):
@@ -215,7 +409,8 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
                     amount=item["amount"],
                 )
             )
-        IngredientInRecipe.objects.bulk_create(objs)
+        if objs:
+            IngredientInRecipe.objects.bulk_create(objs)
 
     def validate_cooking_time(self, value):
         if value < 1:
@@ -224,6 +419,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             )
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         tags_data = validated_data.pop("tags")
@@ -232,13 +428,57 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         self.create_ingredients(ingredients_data, recipe)
         return recipe
 
+    def update_ingredients(self, ingredients_data, recipe):
+        """Приводит ингредиенты рецепта к присланным, меняя только разницу."""
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        submitted = {item["id"]: item["amount"] for item in ingredients_data}
+        deltas = {
+            ingredient_id: submitted.get(ingredient_id, 0) - item.amount
+            for ingredient_id, item in current.items()
+        }
+        for ingredient_id, amount in submitted.items():
+            deltas.setdefault(ingredient_id, amount)
+        changed = []
+        for ingredient_id, amount in submitted.items():
+            item = current.get(ingredient_id)
+            if item is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        dropped = [
+            item.pk
+            for ingredient_id, item in current.items()
+            if ingredient_id not in submitted
+        ]
+        if dropped:
+            IngredientInRecipe.objects.filter(pk__in=dropped).delete()
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ["amount"])
+        self.create_ingredients(
+            [item for item in ingredients_data if item["id"] not in current],
+            recipe,
+        )
+        change_recipe_ingredients(recipe.pk, deltas)
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients_data = validated_data.pop("ingredients")
-        tags_data = validated_data.pop("tags")
-        instance = super().update(instance, validated_data)
-        instance.tags.set(tags_data)
-        instance.recipe_ingredients.all().delete()
-        self.create_ingredients(ingredients_data, instance)
+        ingredients_data = validated_data.pop("ingredients", None)
+        tags_data = validated_data.pop("tags", None)
+        changed_fields = [
+            field
+            for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        for field in changed_fields:
+            setattr(instance, field, validated_data[field])
+        if changed_fields:
+            instance.save(update_fields=changed_fields)
+        if tags_data is not None:
+            instance.tags.set(tags_data)
+        if ingredients_data is not None:
+            self.update_ingredients(ingredients_data, instance)
         return instance
 
 
@@ -259,6 +499,17 @@ class BaseRecipeRelationSerializer(serializers.ModelSerializer):
         return data
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
+
+
 class FavoriteSerializer(BaseRecipeRelationSerializer):
     class Meta:
         model = Favorite
@@ -272,6 +523,16 @@ class ShoppingCartSerializer(BaseRecipeRelationSerializer):
 
 
 class RecipeMiniSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField("image")
+    image_srcset = ImageSrcsetField("image")
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = (
+            "id",
+            "name",
+            "image",
+            "image_variants",
+            "image_srcset",
+            "cooking_time",
+        )
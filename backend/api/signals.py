@@ -0,0 +1,61 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.utils.cache import bump_cache_version
+from recipes.catalog import catalog_synced
+from recipes.images import variants_updated
+from recipes.models import Ingredient, Recipe, Tag
+from user.models import CustomUser
+
+# Поля пользователя, которые видны в ответах API.
+PUBLIC_USER_FIELDS = {
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "avatar",
+    "avatar_variants",
+}
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(catalog_synced, sender=Recipe)
+@receiver(variants_updated, sender=Recipe)
+def invalidate_recipe_counts(sender, **kwargs):
+    bump_cache_version("recipes")
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_ids(sender, **kwargs):
+    bump_cache_version("recipe_ids")
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(catalog_synced, sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    bump_cache_version("ingredients")
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(catalog_synced, sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    bump_cache_version("tags")
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_users(sender, created=False, update_fields=None, **kwargs):
+    # Новый пользователь ещё не автор ни одного закэшированного рецепта.
+    if created:
+        return
+    if update_fields is None or PUBLIC_USER_FIELDS & set(update_fields):
+        bump_cache_version("users")
+
+
+@receiver(post_delete, sender=CustomUser)
+@receiver(variants_updated, sender=CustomUser)
+def invalidate_deleted_users(sender, **kwargs):
+    bump_cache_version("users")
@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase
+
+from api.benchmark import compare
+
+BASELINE = {
+    "recipes:list": {"p95_ms": 20.0, "queries": 5, "memory_kb": 512.0},
+}
+
+
+class CompareTest(SimpleTestCase):
+    """Регрессии определяются по запросам, p95 и памяти."""
+
+    def check(self, **current):
+        results = {"recipes:list": {**BASELINE["recipes:list"], **current}}
+        return compare(results, BASELINE, 1.25, 1.5)
+
+    def test_unchanged(self):
+        self.assertEqual(self.check(), [])
+
+    def test_any_extra_query_is_regression(self):
+        self.assertEqual(
+            self.check(queries=6), ["recipes:list: запросов 6 (было 5)"]
+        )
+
+    def test_latency_within_tolerance(self):
+        self.assertEqual(self.check(p95_ms=25.0), [])
+
+    def test_latency_regression(self):
+        self.assertEqual(
+            self.check(p95_ms=25.1),
+            ["recipes:list: p95 25.1 мс (было 20.0 мс)"],
+        )
+
+    def test_small_latency_growth_is_noise(self):
+        results = {"tags": {"p95_ms": 2.9, "queries": 1, "memory_kb": 1.0}}
+        baseline = {"tags": {"p95_ms": 1.0, "queries": 1, "memory_kb": 1.0}}
+        self.assertEqual(compare(results, baseline, 1.25, 1.5), [])
+
+    def test_memory_regression(self):
+        self.assertEqual(
+            self.check(memory_kb=800.0),
+            ["recipes:list: память 800.0 КБ (было 512.0 КБ)"],
+        )
+
+    def test_new_scenario_is_skipped(self):
+        results = {"tags": {"p95_ms": 99.0, "queries": 9, "memory_kb": 9.0}}
+        self.assertEqual(compare(results, BASELINE, 1.25, 1.5), [])
@@ -0,0 +1,87 @@
+from django.core.cache import caches
+from django.db import connection
+from rest_framework.test import APIClient, APITestCase
+
+from recipes.models import Ingredient, IngredientInRecipe, Recipe
+from user.models import CustomUser
+
+# Оценка числа строк по pg_class для нефильтрованной выборки.
+ESTIMATE_QUERIES = 1 if connection.vendor == "postgresql" else 0
+# count, рецепты, теги, ингредиенты.
+ANONYMOUS_QUERIES = ESTIMATE_QUERIES + 4
+# count, рецепты с флагами, авторы с is_subscribed, теги, ингредиенты.
+AUTHENTICATED_QUERIES = ESTIMATE_QUERIES + 5
+
+
+class RecipeListQueriesTest(APITestCase):
+    """Число запросов страницы рецептов не зависит от её размера."""
+
+    url = "/api/recipes/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = CustomUser.objects.create_user(
+            email="viewer@example.com",
+            username="viewer",
+            password="password",
+            first_name="Зритель",
+            last_name="Зрителев",
+        )
+        authors = [
+            CustomUser.objects.create_user(
+                email=f"author{number}@example.com",
+                username=f"author{number}",
+                password="password",
+                first_name="Автор",
+                last_name=f"Авторов{number}",
+            )
+            for number in range(3)
+        ]
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {number}", measurement_unit="г")
+            for number in range(3)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=authors[number % len(authors)],
+                name=f"Рецепт {number}",
+                image="recipes/images/recipe.png",
+                text="Описание",
+                cooking_time=10,
+            )
+            for number in range(100)
+        )
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in recipes
+            for ingredient in ingredients
+        )
+
+    def setUp(self):
+        # Закэшированные count и ответы анонимам убрали бы запросы.
+        for alias in ("default", "responses"):
+            caches[alias].clear()
+
+    def assert_page_queries(self, client, limit, expected):
+        with self.assertNumQueries(expected):
+            response = client.get(self.url, {"limit": limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), limit)
+
+    def test_anonymous(self):
+        for limit in (1, 6, 100):
+            with self.subTest(limit=limit):
+                self.setUp()
+                self.assert_page_queries(
+                    APIClient(), limit, ANONYMOUS_QUERIES
+                )
+
+    def test_authenticated(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        for limit in (1, 6, 100):
+            with self.subTest(limit=limit):
+                self.setUp()
+                self.assert_page_queries(
+                    client, limit, AUTHENTICATED_QUERIES
+                )
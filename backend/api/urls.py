@@ -1,4 +1,4 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
 from api import views
@@ -10,6 +10,7 @@ from api.views import (
     RecipeViewSet,
     ShoppingCartViewSet,
     TagViewSet,
+    UploadView,
 )
 
 router = DefaultRouter()
@@ -30,8 +31,9 @@ urlpatterns = [
         DownloadShoppingCartView.as_view(),
         name="download_shopping_cart",
     ),
-    path(
-        "r/<str:short_code>/",
+    path("uploads/", UploadView.as_view(), name="upload"),
+    re_path(
+        r"^r/(?P<short_code>[0-9A-Za-z]+)/?$",
         views.redirect_to_recipe,
         name="redirect_to_recipe",
     ),
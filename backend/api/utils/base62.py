@@ -1,4 +1,7 @@
 ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+INDEX = {char: index for index, char in enumerate(ALPHABET)}
+# Достаточно для любого 64-битного числа.
+MAX_LENGTH = 11
 
 
 def encode_base62(num):
@@ -14,8 +17,15 @@ def encode_base62(num):
 
 
 def decode_base62(short_code):
+    """Число по коду; ``ValueError``, если код пуст, слишком длинный
+    или содержит символы не из алфавита."""
+    if not short_code or len(short_code) > MAX_LENGTH:
+        raise ValueError(f"Неверная длина кода: {short_code!r}")
     base = len(ALPHABET)
     num = 0
-    for char in short_code:
-        num = num * base + ALPHABET.index(char)
+    try:
+        for char in short_code:
+            num = num * base + INDEX[char]
+    except KeyError:
+        raise ValueError(f"Недопустимый символ в коде: {short_code!r}")
     return num
@@ -0,0 +1,39 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def version_key(name):
+    return f"version:{name}"
+
+
+def get_cache_version(name):
+    """Текущая версия группы закэшированных значений."""
+    version = cache.get(version_key(name))
+    if version is None:
+        version = int(time.time() * 1000)
+        cache.add(version_key(name), version, None)
+        version = cache.get(version_key(name), version)
+    return version
+
+
+def bump_cache_version(name):
+    """Делает устаревшими все значения группы после фиксации транзакции."""
+
+    def bump():
+        try:
+            cache.incr(version_key(name))
+        except ValueError:
+            get_cache_version(name)
+
+    transaction.on_commit(bump)
+
+
+def get_cache_versions(names):
+    """Версии нескольких групп одним обращением к кэшу."""
+    found = cache.get_many([version_key(name) for name in names])
+    return [
+        found.get(version_key(name)) or get_cache_version(name)
+        for name in names
+    ]
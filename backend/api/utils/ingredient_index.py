@@ -0,0 +1,67 @@
+import bisect
+import threading
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from api.utils.cache import get_cache_version
+from recipes.models import Ingredient
+
+AUTOCOMPLETE_LIMIT = 50
+
+
+def normalize_name(name):
+    return name.casefold().replace("ё", "е")
+
+
+class IngredientIndex:
+    """Отсортированный индекс ингредиентов в памяти процесса.
+
+    Строится при первом обращении и перестраивается, когда сигналы
+    ``Ingredient`` меняют версию ``ingredients`` в кэше. Версию видят
+    все процессы только при общем кэше (``is_shared``), иначе индекс не
+    узнает о загрузке справочника командой из другого процесса.
+    """
+
+    @property
+    def is_shared(self):
+        return not isinstance(caches["default"], LocMemCache)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.data = ([], [])
+
+    def build(self):
+        rows = sorted(
+            (normalize_name(name), name, pk, unit)
+            for pk, name, unit in Ingredient.objects.values_list(
+                "id", "name", "measurement_unit"
+            )
+        )
+        items = [
+            {"id": pk, "name": name, "measurement_unit": unit}
+            for _, name, pk, unit in rows
+        ]
+        return [row[0] for row in rows], items
+
+    def snapshot(self):
+        version = get_cache_version("ingredients")
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.data = self.build()
+                    self.version = version
+        return self.data
+
+    def search(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        keys, items = self.snapshot()
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return items[:limit]
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\uffff", lo=start)
+        return items[start:min(end, start + limit)]
+
+
+ingredient_index = IngredientIndex()
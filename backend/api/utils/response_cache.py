@@ -0,0 +1,75 @@
+"""Кэш ответов анонимным пользователям.
+
+Ответ хранится в кэше ``responses`` под ключом из хоста, пути,
+значимых параметров запроса в нормализованном виде (отсортированные
+имена и значения) и версий групп, от которых он зависит. Запись в
+модели меняет версию группы (``api.signals``), и старые ответы просто
+перестают читаться, а затем вытесняются.
+"""
+import hashlib
+
+from django.core.cache import caches
+
+from api.utils.cache import get_cache_versions
+
+OUTCOMES = ("hit", "miss")
+
+
+def response_cache():
+    return caches["responses"]
+
+
+def normalize_query(params, allowed):
+    """Параметры из ``allowed`` в порядке имён, значения отсортированы;
+    остальные на ответ не влияют и в ключ не входят."""
+    return "&".join(
+        f"{key}={','.join(sorted(params.getlist(key)))}"
+        for key in sorted(params)
+        if key in allowed
+    )
+
+
+def response_cache_key(name, versions, request, allowed):
+    signature = (
+        f"{request.scheme}://{request.get_host()}{request.path}"
+        f"?{normalize_query(request.query_params, allowed)}"
+    )
+    digest = hashlib.md5(signature.encode(), usedforsecurity=False)
+    version = ".".join(map(str, get_cache_versions(versions)))
+    return f"response:{name}:{version}:{digest.hexdigest()}"
+
+
+def metric_key(name, outcome):
+    return f"metrics:{name}:{outcome}"
+
+
+def record(name, outcome):
+    cache = response_cache()
+    key = metric_key(name, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def metric_keys(names):
+    return [
+        metric_key(name, outcome) for name in names for outcome in OUTCOMES
+    ]
+
+
+def stats(names):
+    """Попадания и промахи по каждому имени."""
+    found = response_cache().get_many(metric_keys(names))
+    return {
+        name: {
+            outcome: found.get(metric_key(name, outcome), 0)
+            for outcome in OUTCOMES
+        }
+        for name in names
+    }
+
+
+def reset_stats(names):
+    response_cache().delete_many(metric_keys(names))
@@ -0,0 +1,121 @@
+"""Сводный список покупок в форматах txt, csv и pdf.
+
+Строки читаются из базы курсором (``.iterator()``) и сразу пишутся
+в ответ, поэтому длинный список не собирается в памяти целиком.
+"""
+import csv
+import hashlib
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFError, TTFont
+from reportlab.pdfgen import canvas
+
+from recipes.models import ShoppingListItem
+
+TITLE = "Список покупок"
+PDF_FONT_NAME = "ShoppingListFont"
+# Больше этого размера PDF сбрасывается из памяти во временный файл.
+PDF_SPOOL_SIZE = 1024 * 1024
+
+
+def shopping_list_items(user):
+    """Готовые строки сводного списка: один диапазон по индексу
+    ``(user, ingredient)``, сколько бы рецептов ни было в корзине."""
+    return ShoppingListItem.objects.filter(user=user)
+
+
+def shopping_list_rows(user):
+    """Строки ``(название, единица, количество)`` по алфавиту."""
+    return (
+        shopping_list_items(user)
+        .order_by("ingredient__name", "ingredient__measurement_unit")
+        .values_list(
+            "ingredient__name", "ingredient__measurement_unit", "amount"
+        )
+        .iterator(chunk_size=500)
+    )
+
+
+def shopping_list_etag(user, file_format):
+    """ETag списка — хеш тех же строк, что попадают в файл.
+
+    Совпадает только у одинаковых списков и не зависит от кэша; при 304
+    пропускается построение файла, а не чтение строк.
+    """
+    digest = hashlib.md5(file_format.encode(), usedforsecurity=False)
+    for row in shopping_list_rows(user):
+        digest.update(repr(row).encode())
+    return digest.hexdigest()
+
+
+def format_line(name, unit, total):
+    return f"{name} ({unit}) — {total}"
+
+
+def iter_txt(rows):
+    yield f"{TITLE}\n\n".encode()
+    for row in rows:
+        yield f"{format_line(*row)}\n".encode()
+
+
+class Echo:
+    """Файлоподобный объект, возвращающий записанное, для ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    # BOM, чтобы Excel распознал UTF-8.
+    yield "\ufeff".encode()
+    yield writer.writerow(["Ингредиент", "Единица", "Количество"]).encode()
+    for row in rows:
+        yield writer.writerow(row).encode()
+
+
+def register_pdf_font():
+    if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        try:
+            pdfmetrics.registerFont(
+                TTFont(PDF_FONT_NAME, settings.SHOPPING_LIST_PDF_FONT)
+            )
+        except TTFError as error:
+            raise ImproperlyConfigured(
+                f"SHOPPING_LIST_PDF_FONT: {error}"
+            ) from error
+
+
+def build_pdf(rows):
+    """PDF во временном файле, готовом к чтению с начала.
+
+    В PDF таблица ссылок на объекты идёт после содержимого, поэтому
+    документ собирается целиком до отправки; большой готовый файл
+    хранится на диске, а не в памяти.
+    """
+    register_pdf_font()
+    file = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_SIZE)
+    pdf = canvas.Canvas(file, pagesize=A4, pageCompression=1)
+    pdf.setTitle(TITLE)
+    _, height = A4
+    margin, line_height = 20 * mm, 6 * mm
+    top = height - margin
+    pdf.setFont(PDF_FONT_NAME, 16)
+    pdf.drawString(margin, top, TITLE)
+    pdf.setFont(PDF_FONT_NAME, 11)
+    y = top - 2 * line_height
+    for row in rows:
+        if y < margin:
+            pdf.showPage()
+            pdf.setFont(PDF_FONT_NAME, 11)
+            y = top
+        pdf.drawString(margin, y, format_line(*row))
+        y -= line_height
+    pdf.save()
+    file.seek(0)
+    return file
@@ -0,0 +1,124 @@
+"""Короткие ссылки на рецепты.
+
+Код — id рецепта в base62. При ``SHORT_LINK_OBFUSCATE`` id меньше
+2**32 предварительно переставляются сетью Фейстеля с ключом из
+``SECRET_KEY``, чтобы коды не выдавали число рецептов и их нельзя было
+перебрать подряд. Смена ключа или настройки делает выданные ссылки
+недействительными.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from api.utils.base62 import decode_base62, encode_base62
+from api.utils.cache import get_cache_version
+from recipes.models import Recipe
+
+SHORT_LINK_PATH = "/s/"
+FEISTEL_ROUNDS = 4
+HALF_BITS = 16
+HALF_MASK = (1 << HALF_BITS) - 1
+OBFUSCATED_LIMIT = 1 << (2 * HALF_BITS)
+
+
+def round_value(key, number, half):
+    digest = hashlib.blake2b(
+        bytes([number]) + half.to_bytes(2, "big"), key=key, digest_size=2
+    ).digest()
+    return int.from_bytes(digest, "big")
+
+
+def obfuscation_key():
+    return hashlib.blake2b(
+        settings.SECRET_KEY.encode(), digest_size=32, person=b"short-links"
+    ).digest()
+
+
+def permute(value, inverse=False):
+    """Взаимно однозначная перестановка чисел ``[0, 2**32)``."""
+    key = obfuscation_key()
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    if inverse:
+        for number in reversed(range(FEISTEL_ROUNDS)):
+            left, right = right ^ round_value(key, number, left), left
+    else:
+        for number in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ round_value(key, number, right)
+    return (left << HALF_BITS) | right
+
+
+def encode_recipe_id(pk):
+    if settings.SHORT_LINK_OBFUSCATE and pk < OBFUSCATED_LIMIT:
+        pk = permute(pk)
+    return encode_base62(pk)
+
+
+def decode_recipe_id(short_code):
+    """Id рецепта по коду; ``ValueError`` для кода, который не мог быть
+    выдан, в том числе для неканонической записи того же числа."""
+    number = decode_base62(short_code)
+    if encode_base62(number) != short_code:
+        raise ValueError(f"Неканонический код: {short_code!r}")
+    if settings.SHORT_LINK_OBFUSCATE and number < OBFUSCATED_LIMIT:
+        number = permute(number, inverse=True)
+    return number
+
+
+def short_link(request, pk):
+    base = settings.SHORT_LINK_BASE_URL or request.build_absolute_uri(
+        SHORT_LINK_PATH
+    )
+    return f"{base}{encode_recipe_id(pk)}"
+
+
+class RecipeIdCache:
+    """Проверка существования рецепта без запроса к БД для частых id.
+
+    Найденные id хранятся в LRU, отсутствующие — ``missing_ttl`` секунд:
+    рецепт с таким id может появиться позже. Удаление рецепта меняет
+    версию ``recipe_ids`` в кэше, и оба набора очищаются.
+    """
+
+    def __init__(self, size, missing_ttl):
+        self.size = size
+        self.missing_ttl = missing_ttl
+        self.lock = threading.Lock()
+        self.version = None
+        self.known = OrderedDict()
+        self.missing = OrderedDict()
+
+    def remember(self, entries, pk, value):
+        entries[pk] = value
+        entries.move_to_end(pk)
+        if len(entries) > self.size:
+            entries.popitem(last=False)
+
+    def exists(self, pk):
+        version = get_cache_version("recipe_ids")
+        with self.lock:
+            if version != self.version:
+                self.known.clear()
+                self.missing.clear()
+                self.version = version
+            if pk in self.known:
+                self.known.move_to_end(pk)
+                return True
+            if self.missing.get(pk, 0) > time.monotonic():
+                return False
+        found = Recipe.objects.filter(pk=pk).exists()
+        with self.lock:
+            if found:
+                self.remember(self.known, pk, True)
+            else:
+                self.remember(
+                    self.missing, pk, time.monotonic() + self.missing_ttl
+                )
+        return found
+
+
+recipe_ids = RecipeIdCache(
+    settings.SHORT_LINK_CACHE_SIZE, settings.SHORT_LINK_MISSING_TTL
+)
@@ -0,0 +1,95 @@
+from recipes.models import Favorite, ShoppingCart, Subscription
+
+TARGETED_LOOKUP_LIMIT = 100
+# Коллекцию не больше этого размера выгоднее загрузить целиком.
+FULL_LOAD_LIMIT = 1000
+
+
+class RelationIds:
+    """Id объектов, связанных с пользователем, загружаемые по требованию.
+
+    Загружаются только id объектов страницы (``IN``), а без страницы —
+    один запрошенный id. Для большой страницы коллекция загружается
+    целиком, если в ней не больше ``FULL_LOAD_LIMIT`` id; размер
+    проверяется тем же ограниченным запросом.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.candidates = set()
+        self.checked = set()
+        self.found = set()
+        self.complete = False
+        self.large = False
+
+    def prime(self, ids):
+        self.candidates.update(ids)
+
+    def __contains__(self, pk):
+        if self.complete or pk in self.checked:
+            return pk in self.found
+        pending = (self.candidates - self.checked) | {pk}
+        if len(pending) > TARGETED_LOOKUP_LIMIT and self.load_all():
+            return pk in self.found
+        self.found.update(
+            self.queryset.filter(
+                **{f"{self.field}__in": pending}
+            ).values_list(self.field, flat=True)
+        )
+        self.checked.update(pending)
+        return pk in self.found
+
+    def load_all(self):
+        """Загружает коллекцию, если она не больше ``FULL_LOAD_LIMIT``."""
+        if self.large:
+            return False
+        ids = list(
+            self.queryset.values_list(self.field, flat=True)[
+                : FULL_LOAD_LIMIT + 1
+            ]
+        )
+        if len(ids) > FULL_LOAD_LIMIT:
+            self.large = True
+            return False
+        self.found = set(ids)
+        self.complete = True
+        return True
+
+
+class ViewerContext:
+    """Подписки, избранное и корзина текущего пользователя на время запроса."""
+
+    def __init__(self, user):
+        self.user = user
+        self.followed = RelationIds(
+            Subscription.objects.filter(user_id=user.pk), "author_id"
+        )
+        self.favorites = RelationIds(
+            Favorite.objects.filter(user_id=user.pk), "recipe_id"
+        )
+        self.cart = RelationIds(
+            ShoppingCart.objects.filter(user_id=user.pk), "recipe_id"
+        )
+
+    def prime(self, recipes=(), authors=()):
+        self.favorites.prime(recipes)
+        self.cart.prime(recipes)
+        self.followed.prime(authors)
+
+    def is_subscribed(self, author_id):
+        return self.user.is_authenticated and author_id in self.followed
+
+    def is_favorited(self, recipe_id):
+        return self.user.is_authenticated and recipe_id in self.favorites
+
+    def is_in_shopping_cart(self, recipe_id):
+        return self.user.is_authenticated and recipe_id in self.cart
+
+
+def get_viewer(request):
+    viewer = getattr(request, "_viewer_context", None)
+    if viewer is None:
+        viewer = ViewerContext(request.user)
+        request._viewer_context = viewer
+    return viewer
@@ -1,22 +1,37 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count, F, Prefetch, Sum
-from django.http import Http404, HttpResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.db.models import Exists, F, OuterRef, Prefetch, Value
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from rest_framework import permissions, status, viewsets
+from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import (
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from api.filters import IngredientFilter, RecipeFilter
-from api.mixins import RecipeActionMixin
-from api.pagination import CustomLimitPagination
+from api.mixins import (
+    AnonymousResponseCacheMixin,
+    CursorPaginationMixin,
+    RecipeActionMixin,
+    parse_pk,
+)
+from api.pagination import (
+    CustomLimitPagination,
+    RecipeCursorPagination,
+    RecipeLimitPagination,
+    SubscriptionCursorPagination,
+)
 from api.permissions import IsAuthorOrReadOnly
+from api.renderers import CsvRenderer, PdfRenderer, TxtRenderer
 from api.serializers import (
     CustomUserBaseSerializer,
     CustomUserWithRecipesSerializer,
@@ -25,9 +40,21 @@ from api.serializers import (
     RecipeReadSerializer,
     RecipeWriteSerializer,
     ShoppingCartSerializer,
+    ShoppingListItemSerializer,
     TagPublicSerializer,
+    UploadSerializer,
+)
+from api.utils.cache import bump_cache_version
+from api.utils.ingredient_index import AUTOCOMPLETE_LIMIT, ingredient_index
+from api.utils.shopping_list import (
+    build_pdf,
+    iter_csv,
+    iter_txt,
+    shopping_list_etag,
+    shopping_list_items,
+    shopping_list_rows,
 )
-from api.utils.base62 import decode_base62
+from api.utils.short_links import decode_recipe_id, recipe_ids, short_link
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -37,18 +64,66 @@ from recipes.models import (
     Subscription,
     Tag,
 )
+from recipes.relations import add_relation, remove_relation
 from user.models import CustomUser
 
 User = get_user_model()
 
 
-class RecipeViewSet(RecipeActionMixin, viewsets.ModelViewSet):
-    queryset = Recipe.objects.all().order_by("-pub_date")
+class RecipeViewSet(
+    AnonymousResponseCacheMixin,
+    CursorPaginationMixin,
+    RecipeActionMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Recipe.objects.defer("search_vector").order_by("-pub_date")
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     filter_backends = [DjangoFilterBackend]
-    search_fields = ("^name", "name")
     filterset_class = RecipeFilter
-    pagination_class = CustomLimitPagination
+    pagination_class = RecipeLimitPagination
+    cursor_pagination_classes = {"list": RecipeCursorPagination}
+    response_cache_name = "recipes"
+    response_cache_versions = ("recipes", "tags", "ingredients", "users")
+    response_cache_params = ("page", "limit", "cursor", "pagination")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ["list", "retrieve"]:
+            return queryset
+        queryset = queryset.prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.all()),
+            Prefetch(
+                "recipe_ingredients",
+                queryset=IngredientInRecipe.objects.select_related(
+                    "ingredient"
+                ),
+            ),
+        )
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.select_related("author").annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+            )
+        return queryset.prefetch_related(
+            Prefetch(
+                "author",
+                queryset=User.objects.annotate(
+                    is_subscribed=Exists(
+                        Subscription.objects.filter(
+                            user=user, author=OuterRef("pk")
+                        )
+                    )
+                ),
+            )
+        ).annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+        )
 
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
@@ -58,6 +133,11 @@ class RecipeViewSet(RecipeActionMixin, viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def perform_update(self, serializer):
+        serializer.save()
+        # Ингредиенты меняются массовыми запросами, без сигналов.
+        bump_cache_version("recipes")
+
     @action(
         detail=True,
         methods=["post", "delete"],
@@ -86,6 +166,26 @@ class RecipeViewSet(RecipeActionMixin, viewsets.ModelViewSet):
             error_message="Рецепт уже в списке покупок.",
         )
 
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        permission_classes=[permissions.IsAuthenticated],
+        url_path="favorite/bulk",
+        url_name="favorite-bulk",
+    )
+    def favorite_bulk(self, request):
+        return self.perform_bulk_action(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        permission_classes=[permissions.IsAuthenticated],
+        url_path="shopping_cart/bulk",
+        url_name="shopping-cart-bulk",
+    )
+    def shopping_cart_bulk(self, request):
+        return self.perform_bulk_action(request, ShoppingCart)
+
     @action(
         detail=True,
         methods=["GET"],
@@ -93,16 +193,24 @@ class RecipeViewSet(RecipeActionMixin, viewsets.ModelViewSet):
         url_name="get-link",
     )
     def get_link(self, request, pk=None):
-        if not Recipe.objects.filter(pk=pk).exists():
+        recipe_id = parse_pk(pk)
+        if not recipe_ids.exists(recipe_id):
             raise Http404("Рецепт не найден")
-        url = request.build_absolute_uri(f"/recipes/{pk}/")
-        return Response({"short-link": url}, status=status.HTTP_200_OK)
+        return Response(
+            {"short-link": short_link(request, recipe_id)},
+            status=status.HTTP_200_OK,
+        )
 
 
 def redirect_to_recipe(request, short_code):
-    recipe_id = decode_base62(short_code)
-    recipe = get_object_or_404(Recipe, id=recipe_id)
-    return redirect(f"/recipes/{recipe.id}/")
+    """Переход по короткой ссылке; частые id проверяются без запросов."""
+    try:
+        recipe_id = decode_recipe_id(short_code)
+    except ValueError:
+        raise Http404("Неверная короткая ссылка")
+    if not recipe_ids.exists(recipe_id):
+        raise Http404("Рецепт не найден")
+    return redirect(f"/recipes/{recipe_id}/")
 
 
 class FavoriteViewSet(viewsets.ReadOnlyModelViewSet):
@@ -115,18 +223,42 @@ class FavoriteViewSet(viewsets.ReadOnlyModelViewSet):
         )
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(AnonymousResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly]
     serializer_class = TagPublicSerializer
+    response_cache_name = "tags"
+    response_cache_versions = ("tags",)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    AnonymousResponseCacheMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
+    response_cache_name = "ingredients"
+    response_cache_versions = ("ingredients",)
+
+    def list(self, request, *args, **kwargs):
+        """Поиск по началу названия из индекса в памяти, без запроса к БД.
+
+        Без ``name`` или без общего кэша ответ строит ``IngredientFilter``
+        по базе (через кэш ответов); оба пути отдают не больше
+        ``AUTOCOMPLETE_LIMIT`` строк.
+        """
+        name = request.query_params.get("name", "").strip()
+        if name and ingredient_index.is_shared:
+            return Response(ingredient_index.search(name))
+        return super().list(request, *args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == "list":
+            return queryset.order_by("name")[:AUTOCOMPLETE_LIMIT]
+        return queryset
 
 
 class ShoppingCartViewSet(viewsets.ReadOnlyModelViewSet):
@@ -138,13 +270,35 @@ class ShoppingCartViewSet(viewsets.ReadOnlyModelViewSet):
             in_shopping_carts__user=self.request.user,
         ).order_by("-in_shopping_carts__id")
 
+    @action(detail=False)
+    def summary(self, request):
+        """Число рецептов в корзине и сводный список ингредиентов."""
+        items = (
+            shopping_list_items(request.user)
+            .select_related("ingredient")
+            .order_by("ingredient__name", "ingredient__measurement_unit")
+        )
+        return Response(
+            {
+                "recipes": ShoppingCart.objects.filter(
+                    user=request.user
+                ).count(),
+                "ingredients": ShoppingListItemSerializer(
+                    items, many=True
+                ).data,
+            }
+        )
+
 
-class CustomUserViewSet(UserViewSet):
-    queryset = CustomUser.objects.all()
+class CustomUserViewSet(CursorPaginationMixin, UserViewSet):
+    queryset = CustomUser.objects.order_by("id")
     permission_classes = [IsAuthenticated]
     lookup_url_kwarg = "id"
     lookup_field = "id"
     pagination_class = CustomLimitPagination
+    cursor_pagination_classes = {
+        "subscriptions": SubscriptionCursorPagination
+    }
 
     def get_serializer_class(self):
         if self.action in ["me", "retrieve"]:
@@ -160,28 +314,26 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscribe(self, request, *args, **kwargs):
         """Подписаться/отписаться на пользователя"""
-        author = self.get_object()
         user = request.user
-        if user == author:
+        author_id = parse_pk(self.kwargs[self.lookup_url_kwarg])
+        if user.pk == author_id:
             return Response(
                 {"error": "Нельзя подписаться на самого себя"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
         if request.method == "POST":
-            if Subscription.objects.filter(user=user, author=author).exists():
+            author = self.get_object()
+            if not add_relation(Subscription, user.pk, "author", author.pk):
                 return Response(
                     {"error": "Вы уже подписаны на этого пользователя"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            Subscription.objects.create(user=user, author=author)
             serializer = CustomUserWithRecipesSerializer(
                 author, context={"request": request}
             )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        deleted_count, _ = Subscription.objects.filter(
-            user=user, author=author
-        ).delete()
-        if deleted_count == 0:
+        if not remove_relation(Subscription, user.pk, "author", author_id):
+            self.get_object()
             return Response(
                 {"error": "Вы не подписаны на этого пользователя"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -198,17 +350,28 @@ class CustomUserViewSet(UserViewSet):
     def subscriptions(self, request):
         """Получить список моих подписок"""
         user = request.user
+        recipes = Recipe.objects.order_by("-pub_date", "-id").only(
+            "id",
+            "author_id",
+            "name",
+            "image",
+            "image_variants",
+            "cooking_time",
+        )
+        recipes_limit = CustomUserWithRecipesSerializer.parse_recipes_limit(
+            request
+        )
+        if recipes_limit is not None:
+            recipes = recipes[:recipes_limit]
         authors = (
             CustomUser.objects.filter(followers__user=user)
+            .annotate(subscription_id=F("followers__id"))
+            .order_by("-subscription_id")
             .prefetch_related(
                 Prefetch(
-                    "recipes",
-                    queryset=Recipe.objects.order_by("-pub_date").only(
-                        "id", "name", "image", "cooking_time"
-                    ),
+                    "recipes", queryset=recipes, to_attr="preview_recipes"
                 )
             )
-            .annotate(recipes_count=Count("recipes"))
         )
         page = self.paginate_queryset(authors)
         if page is not None:
@@ -236,7 +399,10 @@ class CustomUserViewSet(UserViewSet):
             return Response(
                 {"avatar": user.avatar.url}, status=status.HTTP_200_OK
             )
-        user.avatar.delete(save=True)
+        # Файл может быть общим с другими пользователями: его удалит
+        # collect_media, когда на него не останется ссылок.
+        user.avatar = None
+        user.save(update_fields=["avatar"])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(["get"], detail=False)
@@ -247,30 +413,59 @@ class CustomUserViewSet(UserViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class UploadView(generics.CreateAPIView):
+    """Принимает изображение multipart-запросом и возвращает токен.
+
+    Файл пишется на диск по частям, не собираясь в памяти целиком.
+    """
+
+    serializer_class = UploadSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+
 class DownloadShoppingCartView(APIView):
+    """Сводный список ингредиентов из корзины файлом txt, csv или pdf.
+
+    Формат задаётся ``?format=`` (по умолчанию txt). Текстовые форматы
+    отдаются потоком по мере чтения строк из базы; повторный запрос
+    с ``If-None-Match`` получает 304 без построения файла.
+    """
+
     permission_classes = [IsAuthenticated]
+    renderer_classes = [TxtRenderer, CsvRenderer, PdfRenderer]
 
     def get(self, request):
-        """Возвращает файл .txt со сводным списком ингредиентов."""
-
-        qs = IngredientInRecipe.objects.filter(
-            recipe__in_shopping_carts__user=request.user,
-        )
-        aggregated = qs.values(
-            name=F("ingredient__name"),
-            unit=F("ingredient__measurement_unit"),
-        ).annotate(total=Sum("amount"))
-
-        lines = [
-            f"{item['name']} ({item['unit']}) — {item['total']}"
-            for item in aggregated
-        ]
-        content = "\n".join(lines)
-        response = HttpResponse(
-            content,
-            content_type="text/plain; charset=utf-8",
-        )
-        response["Content-Disposition"] = (
-            'attachment; filename="shopping_list.txt"'
-        )
+        file_format = request.accepted_renderer.format
+        etag = quote_etag(shopping_list_etag(request.user, file_format))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        rows = shopping_list_rows(request.user)
+        filename = f"shopping_list.{file_format}"
+        if file_format == "pdf":
+            response = FileResponse(
+                build_pdf(rows),
+                as_attachment=True,
+                filename=filename,
+                content_type=PdfRenderer.media_type,
+            )
+        else:
+            stream = iter_csv(rows) if file_format == "csv" else iter_txt(rows)
+            response = StreamingHttpResponse(
+                stream,
+                content_type=f"{request.accepted_media_type}; charset=utf-8",
+            )
+            response["Content-Disposition"] = (
+                f'attachment; filename="{filename}"'
+            )
+        response["ETag"] = etag
+        patch_vary_headers(response, ["Authorization", "Accept"])
         return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if isinstance(response, Response):
+            # Ошибки отдаются в JSON, как и в остальном API.
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
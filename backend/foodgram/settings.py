@@ -35,6 +35,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_extensions",
     "rest_framework",
     "rest_framework.authtoken",
@@ -107,6 +108,47 @@ DJOSER = {
 
 WSGI_APPLICATION = "foodgram.wsgi.application"
 
+# Бэкенд кэшей: locmem (по умолчанию, в памяти процесса), file или
+# redis (любой сервер с протоколом Redis, CACHE_LOCATION вида
+# redis://redis:6379/0). Версии групп кэша живут в default, поэтому при
+# нескольких процессах нужен общий бэкенд, иначе сброс виден только
+# процессу, в котором произошла запись: индекс ингредиентов и кэш ответов
+# в gunicorn не узнают о загрузке справочника или обработке изображений
+# в других контейнерах. docker-compose поднимает для этого redis.
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+CACHE_LOCATION = os.getenv("CACHE_LOCATION", "/tmp/foodgram_cache")
+
+
+def cache_config(alias, timeout=300, max_entries=300):
+    config = {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": CACHE_LOCATION,
+        "KEY_PREFIX": alias,
+        "TIMEOUT": timeout,
+    }
+    if CACHE_BACKEND == "locmem":
+        config["LOCATION"] = alias
+    elif CACHE_BACKEND == "file":
+        config["LOCATION"] = os.path.join(CACHE_LOCATION, alias)
+    if CACHE_BACKEND != "redis":
+        # Redis вытесняет ключи сам (maxmemory-policy).
+        config["OPTIONS"] = {"MAX_ENTRIES": max_entries}
+    return config
+
+
+CACHES = {
+    "default": cache_config("default"),
+    # Ответы анонимным пользователям (api.utils.response_cache).
+    "responses": cache_config(
+        "responses", timeout=60 * 60, max_entries=5000
+    ),
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -152,8 +194,34 @@ MEDIA_URL = "/media/"
 
 MEDIA_ROOT = "/backend_media/"
 
-DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+FILE_UPLOAD_HANDLERS = [
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
 
-SHORT_LINK_BASE_URL = os.environ.get(
-    "SHORT_LINK_BASE_URL", "http://short.link/"
+# TrueType-шрифт с кириллицей для списка покупок в PDF.
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
 )
+
+STORAGES = {
+    "default": {
+        "BACKEND": "recipes.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Префикс коротких ссылок, например "https://example.com/s/";
+# по умолчанию — путь /s/ на домене запроса (nginx ведёт его в /api/r/).
+SHORT_LINK_BASE_URL = os.environ.get("SHORT_LINK_BASE_URL", "")
+# Скрывать последовательные id в кодах; смена значения или SECRET_KEY
+# делает выданные ссылки недействительными.
+SHORT_LINK_OBFUSCATE = os.getenv("SHORT_LINK_OBFUSCATE", "False") == "True"
+SHORT_LINK_CACHE_SIZE = 10000
+SHORT_LINK_MISSING_TTL = 5 * 60
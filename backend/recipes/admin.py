@@ -2,13 +2,18 @@ from django.contrib import admin
 
 from .models import (
     Favorite,
+    ImageJob,
     Ingredient,
     IngredientInRecipe,
     Recipe,
     ShoppingCart,
+    StoredFile,
     Subscription,
     Tag,
+    Upload,
 )
+from .relations import delete_relations
+from .shopping_lists import rebuild_shopping_lists
 
 
 class IngredientInRecipeInline(admin.TabularInline):
@@ -23,10 +28,17 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ("tags",)
     inlines = (IngredientInRecipeInline,)
 
-    def favorites_count(self, obj):
-        return obj.favorited_by.count()
-
-    favorites_count.short_description = "Добавлений в избранное"
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if change:
+            # Правка ингредиентов в админке меняет списки покупок.
+            rebuild_shopping_lists(
+                list(
+                    form.instance.in_shopping_carts.values_list(
+                        "user_id", flat=True
+                    )
+                )
+            )
 
 
 @admin.register(Ingredient)
@@ -41,16 +53,47 @@ class TagAdmin(admin.ModelAdmin):
     search_fields = ("name", "slug")
 
 
+class RecipeRelationAdmin(admin.ModelAdmin):
+    """Удаляет связи через ``delete_relations``: сигналов удаления у
+    избранного и корзины нет."""
+
+    def delete_model(self, request, obj):
+        delete_relations(self.model, self.model.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        delete_relations(self.model, queryset)
+
+
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(RecipeRelationAdmin):
     list_display = ("user", "recipe")
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(RecipeRelationAdmin):
     list_display = ("user", "recipe")
 
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ("user", "author")
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ("source", "status", "attempts", "updated_at")
+    list_filter = ("status",)
+    search_fields = ("source",)
+
+
+@admin.register(StoredFile)
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ("name", "ref_count", "updated_at")
+    search_fields = ("name",)
+    readonly_fields = ("name", "ref_count", "updated_at")
+
+
+@admin.register(Upload)
+class UploadAdmin(admin.ModelAdmin):
+    list_display = ("token", "user", "file", "created_at")
+    readonly_fields = ("token", "created_at")
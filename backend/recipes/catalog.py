@@ -0,0 +1,91 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.dispatch import Signal
+
+from recipes.models import Ingredient, Tag
+
+# Отправляется после массовой загрузки данных (sender — модель):
+# bulk_create не вызывает post_save, а зависящие от данных кэши нужно
+# сбросить.
+catalog_synced = Signal()
+
+CATALOGS = {
+    "ingredients": (Ingredient, "name", ("name", "measurement_unit")),
+    "tags": (Tag, "slug", ("name", "slug")),
+}
+
+
+def read_rows(file, file_format, fields):
+    """Построчно читает CSV (колонки в порядке ``fields``) или NDJSON."""
+    if file_format == "ndjson":
+        rows = (json.loads(line) for line in file if line.strip())
+        rows = ([row.get(field) for field in fields] for row in rows)
+    else:
+        rows = csv.reader(file)
+    for row in rows:
+        values = [str(value or "").strip() for value in row]
+        if values == list(fields):
+            continue
+        yield values
+
+
+class CatalogSync:
+    """Загружает справочник пакетами: одна выборка и одна вставка
+    ``INSERT ... ON CONFLICT DO UPDATE`` на пакет."""
+
+    def __init__(self, catalog, batch_size=5000, dry_run=False):
+        self.model, self.key, self.fields = CATALOGS[catalog]
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.stats = dict.fromkeys(
+            ("inserted", "updated", "unchanged", "skipped"), 0
+        )
+
+    def run(self, rows):
+        with transaction.atomic():
+            rows = iter(rows)
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self.sync_batch(batch)
+            if not self.dry_run and (
+                self.stats["inserted"] or self.stats["updated"]
+            ):
+                catalog_synced.send(sender=self.model)
+        return self.stats
+
+    def sync_batch(self, batch):
+        submitted = {}
+        key_index = self.fields.index(self.key)
+        for values in batch:
+            if len(values) != len(self.fields) or not all(values):
+                self.stats["skipped"] += 1
+                continue
+            submitted[values[key_index]] = tuple(values)
+        existing = {
+            row[key_index]: row
+            for row in self.model.objects.filter(
+                **{f"{self.key}__in": submitted}
+            ).values_list(*self.fields)
+        }
+        changed = []
+        for key, values in submitted.items():
+            current = existing.get(key)
+            if current == values:
+                self.stats["unchanged"] += 1
+                continue
+            self.stats["inserted" if current is None else "updated"] += 1
+            changed.append(self.model(**dict(zip(self.fields, values))))
+        if changed and not self.dry_run:
+            self.model.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=[self.key],
+                update_fields=[
+                    field for field in self.fields if field != self.key
+                ],
+            )
@@ -0,0 +1,50 @@
+from collections import Counter, defaultdict
+
+from django.db.models import F, QuerySet
+from django.utils import timezone
+
+from recipes.models import StoredFile
+
+
+def change_counter(model, pks, field, delta):
+    """Атомарно меняет счётчик ``field`` у объектов с id из ``pks``
+    (список или подзапрос)."""
+    if not isinstance(pks, (list, tuple, set, QuerySet)):
+        pks = [pks]
+    queryset = model.objects.filter(pk__in=pks)
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_file_refs(names, delta):
+    """Меняет число ссылок на файлы хранилища.
+
+    Файлы, на которые больше никто не ссылается, удаляет команда
+    ``collect_media``.
+    """
+    groups = defaultdict(list)
+    for name, times in Counter(name for name in names if name).items():
+        groups[times * delta].append(name)
+    if not groups:
+        return
+    if delta > 0:
+        StoredFile.objects.bulk_create(
+            [StoredFile(name=name) for name in set().union(*groups.values())],
+            ignore_conflicts=True,
+        )
+    now = timezone.now()
+    for change, group in groups.items():
+        queryset = StoredFile.objects.filter(pk__in=group)
+        if change < 0:
+            queryset = queryset.filter(ref_count__gte=-change)
+        queryset.update(ref_count=F("ref_count") + change, updated_at=now)
+
+
+def track_unused_files(names):
+    """Регистрирует файлы, на которые никто не ссылается, чтобы их удалил
+    ``collect_media``; у уже известных файлов счётчик не меняется."""
+    StoredFile.objects.bulk_create(
+        [StoredFile(name=name, ref_count=0) for name in set(names) if name],
+        ignore_conflicts=True,
+    )
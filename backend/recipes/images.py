@@ -0,0 +1,203 @@
+import io
+import os
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from recipes.counters import change_file_refs, track_unused_files
+from recipes.models import ImageJob
+
+MAX_SIDE = 1920
+VARIANT_WIDTHS = (96, 320, 960)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+# Копия, которая заменяет исходник в поле модели, и имя, под которым
+# её сохраняет повторная загрузка в base64 (так она не обрабатывается
+# заново).
+SANITIZED_VARIANT = ("full", "jpeg")
+SANITIZED_FILENAME = "image.jpg"
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=10)
+
+# Отправляется после записи готовых копий (sender — модель): запись идёт
+# через update() и post_save не вызывает.
+variants_updated = Signal()
+
+
+def variant_name(source, size, extension):
+    directory, filename = os.path.split(os.path.splitext(source)[0])
+    return os.path.join(
+        directory, "variants", f"{filename}_{size}.{extension}"
+    )
+
+
+def variant_files(variants):
+    """Имена всех файлов копий из ``<поле>_variants``."""
+    return [
+        name
+        for formats in (variants or {}).get("sizes", {}).values()
+        for name in formats.values()
+    ]
+
+
+def encode(image, extension):
+    image_format, options = VARIANT_FORMATS[extension]
+    if extension == "jpeg" and image.mode != "RGB":
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(source, storage, sanitized_name):
+    """Проверяет исходник и сохраняет уменьшенные копии без метаданных.
+
+    Возвращает ``{"source": имя, "sizes": {размер: {формат: имя}},
+    "widths": {размер: ширина}}``; размер ``full`` — исходник, уменьшенный
+    до ``MAX_SIDE``. Копия не шире исходника: для узкого изображения
+    ширина в ``widths`` меньше номинальной.
+    ``source`` — имя копии ``SANITIZED_VARIANT``, сохранённой как
+    ``sanitized_name``: она заменяет исходник с метаданными в поле модели.
+    """
+    with storage.open(source, "rb") as file:
+        image = Image.open(file)
+        image.load()
+    image = ImageOps.exif_transpose(image).convert("RGBA")
+    image.info = {}
+    image.thumbnail((MAX_SIDE, MAX_SIDE), Image.LANCZOS)
+    resized = {"full": image}
+    for width in VARIANT_WIDTHS:
+        if width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            resized[str(width)] = image.resize((width, height), Image.LANCZOS)
+        else:
+            resized[str(width)] = image
+    sizes = {}
+    for size, variant in resized.items():
+        sizes[size] = {}
+        for extension in VARIANT_FORMATS:
+            name = variant_name(source, size, extension)
+            if (size, extension) == SANITIZED_VARIANT:
+                name = sanitized_name
+            sizes[size][extension] = storage.save(
+                name, ContentFile(encode(variant, extension))
+            )
+    size, extension = SANITIZED_VARIANT
+    return {
+        "source": sizes[size][extension],
+        "sizes": sizes,
+        "widths": {size: variant.width for size, variant in resized.items()},
+    }
+
+
+def enqueue_image(instance, field_name):
+    """Ставит в очередь обработку изображения, если оно изменилось."""
+    name = getattr(instance, field_name).name
+    variants_field = f"{field_name}_variants"
+    variants = getattr(instance, variants_field) or {}
+    if not name:
+        if variants:
+            type(instance).objects.filter(pk=instance.pk).update(
+                **{variants_field: {}}
+            )
+            change_file_refs(variant_files(variants), -1)
+        return
+    if variants.get("source") == name:
+        return
+    job = ImageJob(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        field_name=field_name,
+        source=name,
+    )
+    transaction.on_commit(
+        lambda: ImageJob.objects.bulk_create([job], ignore_conflicts=True)
+    )
+
+
+def claim_jobs(limit):
+    """Забирает до ``limit`` задач; зависшие задачи возвращает в очередь."""
+    now = timezone.now()
+    ImageJob.objects.filter(
+        status=ImageJob.PROCESSING, updated_at__lt=now - STALE_AFTER
+    ).update(status=ImageJob.PENDING)
+    with transaction.atomic():
+        job_ids = list(
+            ImageJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ImageJob.PENDING)
+            .order_by("id")
+            .values_list("id", flat=True)[:limit]
+        )
+        ImageJob.objects.filter(pk__in=job_ids).update(
+            status=ImageJob.PROCESSING,
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+    return job_ids
+
+
+def process_job(job_id):
+    job = ImageJob.objects.select_related("content_type").get(pk=job_id)
+    model = job.content_type.model_class()
+    objects = model.objects.filter(
+        pk=job.object_id, **{job.field_name: job.source}
+    )
+    if not objects.exists():
+        job.status = ImageJob.DONE
+        job.save(update_fields=["status", "updated_at"])
+        return job.status
+    field = model._meta.get_field(job.field_name)
+    try:
+        variants = build_variants(
+            job.source,
+            field.storage,
+            field.generate_filename(None, SANITIZED_FILENAME),
+        )
+    except (OSError, ValueError, Image.DecompressionBombError) as error:
+        job.error = str(error)
+        job.status = (
+            ImageJob.FAILED
+            if job.attempts >= MAX_ATTEMPTS
+            else ImageJob.PENDING
+        )
+    else:
+        variants_field = f"{job.field_name}_variants"
+        with transaction.atomic():
+            previous = (
+                objects.select_for_update()
+                .values_list(variants_field, flat=True)
+                .first()
+            )
+            if previous is not None:
+                # Исходник с EXIF больше не отдаётся: поле указывает на
+                # очищенную копию, а сам файл удалит collect_media.
+                objects.update(
+                    **{
+                        job.field_name: variants["source"],
+                        variants_field: variants,
+                    }
+                )
+                change_file_refs(
+                    variant_files(variants) + [variants["source"]], 1
+                )
+                change_file_refs(
+                    variant_files(previous) + [job.source], -1
+                )
+                variants_updated.send(sender=model)
+            else:
+                # Изображение сменилось, пока шла обработка: копии уже
+                # записаны, но ссылок на них нет.
+                track_unused_files(variant_files(variants))
+        job.status = ImageJob.DONE
+    job.save(update_fields=["status", "error", "updated_at"])
+    return job.status
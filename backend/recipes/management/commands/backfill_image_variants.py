@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from recipes.models import ImageJob, Recipe
+
+IMAGE_FIELDS = (
+    (Recipe, "image"),
+    (get_user_model(), "avatar"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Ставит в очередь изображения без уменьшенных копий "
+        "и обрабатывает её. Повторный запуск продолжает с места остановки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Вернуть в очередь задачи, завершившиеся ошибкой.",
+        )
+        parser.add_argument(
+            "--enqueue-only",
+            action="store_true",
+            help="Только поставить задачи в очередь, не обрабатывая их.",
+        )
+
+    def handle(self, *args, **options):
+        for model, field_name in IMAGE_FIELDS:
+            queued = self.enqueue(model, field_name, options["batch_size"])
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: "
+                f"поставлено в очередь {queued}"
+            )
+        if options["retry_failed"]:
+            retried = ImageJob.objects.filter(
+                status=ImageJob.FAILED
+            ).update(status=ImageJob.PENDING, attempts=0, error="")
+            self.stdout.write(f"Повторно в очереди: {retried}")
+        if not options["enqueue_only"]:
+            process_options = {"once": True}
+            if options["workers"]:
+                process_options["workers"] = options["workers"]
+            call_command("process_images", **process_options)
+
+    def enqueue(self, model, field_name, batch_size):
+        """Ставит в очередь объекты, у которых копии устарели.
+
+        Существующие задачи для того же файла не дублируются, а
+        выполненные, но не давшие копий, запускаются заново.
+        """
+        content_type = ContentType.objects.get_for_model(model)
+        variants_field = f"{field_name}_variants"
+        objects = (
+            model.objects.exclude(**{field_name: ""})
+            .exclude(**{f"{field_name}__isnull": True})
+            .order_by("pk")
+            .values_list("pk", field_name, variants_field)
+        )
+        queued = 0
+        last_pk = None
+        while True:
+            batch = objects
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            rows = list(batch[:batch_size])
+            if not rows:
+                return queued
+            last_pk = rows[-1][0]
+            jobs = [
+                ImageJob(
+                    content_type=content_type,
+                    object_id=pk,
+                    field_name=field_name,
+                    source=source,
+                )
+                for pk, source, variants in rows
+                if (variants or {}).get("source") != source
+            ]
+            ImageJob.objects.bulk_create(jobs, ignore_conflicts=True)
+            ImageJob.objects.filter(
+                content_type=content_type,
+                field_name=field_name,
+                object_id__in=[job.object_id for job in jobs],
+                source__in=[job.source for job in jobs],
+                status=ImageJob.DONE,
+            ).update(status=ImageJob.PENDING, attempts=0)
+            queued += len(jobs)
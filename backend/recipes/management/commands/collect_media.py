@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.models import StoredFile, Upload
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет устаревшие загрузки и файлы хранилища, "
+        "на которые не осталось ссылок."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=24,
+            help="Не трогать файлы, изменённые за это число часов.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if not options["dry_run"]:
+            expired, _ = Upload.objects.filter(
+                created_at__lt=now - Upload.TTL
+            ).delete()
+            self.stdout.write(f"Удалено устаревших загрузок: {expired}")
+        cutoff = now - timedelta(hours=options["grace_hours"])
+        unused = StoredFile.objects.filter(
+            ref_count=0, updated_at__lt=cutoff
+        ).order_by("pk")
+        removed = 0
+        last_name = ""
+        while True:
+            names = list(
+                unused.filter(pk__gt=last_name).values_list(
+                    "pk", flat=True
+                )[: options["batch_size"]]
+            )
+            if not names:
+                break
+            last_name = names[-1]
+            names = [
+                name
+                for name in names
+                if not self.recently_used(name, cutoff)
+            ]
+            if options["dry_run"]:
+                removed += len(names)
+                continue
+            with transaction.atomic():
+                names = list(
+                    unused.filter(pk__in=names)
+                    .select_for_update(skip_locked=True)
+                    .values_list("pk", flat=True)
+                )
+                StoredFile.objects.filter(pk__in=names).delete()
+            for name in names:
+                default_storage.delete(name)
+            removed += len(names)
+        self.stdout.write(
+            self.style.SUCCESS(f"Удалено неиспользуемых файлов: {removed}")
+        )
+
+    @staticmethod
+    def recently_used(name, cutoff):
+        try:
+            return default_storage.get_modified_time(name) >= cutoff
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import synthetic
+from recipes.catalog import catalog_synced
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.workers import setup_worker
+from user.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт воспроизводимый синтетический набор данных: пользователей, "
+        "рецепты, избранное, корзины и подписки со степенным распределением."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Число процессов; для SQLite используйте 1.",
+        )
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="Пароль всех созданных пользователей.",
+        )
+
+    def handle(self, *args, **options):
+        if CustomUser.objects.filter(
+            email__endswith=f"@{synthetic.EMAIL_DOMAIN}"
+        ).exists():
+            raise CommandError(
+                "Синтетические данные уже загружены; "
+                "используйте чистую базу."
+            )
+        if options["users"] < 1:
+            raise CommandError("Нужен хотя бы один пользователь.")
+        tag_ids = list(Tag.objects.values_list("pk", flat=True))
+        ingredients = list(Ingredient.objects.values_list("pk", "name"))
+        if not tag_ids or not ingredients:
+            raise CommandError(
+                "Сначала загрузите справочники: sync_catalog ingredients, "
+                "sync_catalog tags."
+            )
+        self.workers = max(1, options["workers"])
+        self.batch_size = options["batch_size"]
+        base = {"seed": options["seed"]}
+
+        with self.stage("Пользователи"):
+            user_ids = self.run(
+                synthetic.create_users,
+                self.ranges(options["users"]),
+                {**base, "password": make_password(options["password"])},
+            )
+        with self.stage("Рецепты"):
+            recipe_ids = self.run(
+                synthetic.create_recipes,
+                self.ranges(options["recipes"]),
+                {
+                    **base,
+                    "user_ids": user_ids,
+                    "ingredients": ingredients,
+                    "tag_ids": tag_ids,
+                    "image": synthetic.placeholder_image(),
+                },
+            )
+        with self.stage("Избранное, корзины и подписки"):
+            counts = self.run(
+                synthetic.create_relations,
+                [
+                    (number, user_ids[start:start + self.batch_size])
+                    for number, start in enumerate(
+                        range(0, len(user_ids), self.batch_size)
+                    )
+                ],
+                {**base, "user_ids": user_ids, "recipe_ids": recipe_ids},
+                flatten=False,
+            )
+            favorites, cart, subscriptions = map(sum, zip(*counts))
+            self.stdout.write(
+                f"избранное: {favorites}, корзины: {cart}, "
+                f"подписки: {subscriptions}"
+            )
+        with self.stage("Счётчики"):
+            call_command("sync_counters", stdout=self.stdout)
+            call_command("rebuild_shopping_lists", stdout=self.stdout)
+        catalog_synced.send(sender=Recipe)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано пользователей: {len(user_ids)}, "
+                f"рецептов: {len(recipe_ids)}"
+            )
+        )
+
+    def ranges(self, total):
+        return [
+            (number, start, min(self.batch_size, total - start))
+            for number, start in enumerate(range(0, total, self.batch_size))
+        ]
+
+    def run(self, function, tasks, options, flatten=True):
+        """Выполняет пакеты в пуле процессов, сохраняя их порядок."""
+        if self.workers == 1:
+            synthetic.configure(options)
+            results = list(map(function, tasks))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=setup_worker,
+                initargs=("recipes.synthetic.configure", options),
+            ) as executor:
+                results = list(executor.map(function, tasks))
+        if not flatten:
+            return results
+        return [pk for result in results for pk in result]
+
+    @contextmanager
+    def stage(self, title):
+        started = time.monotonic()
+        self.stdout.write(f"{title}...")
+        yield
+        self.stdout.write(f"{title}: {time.monotonic() - started:.1f} с")
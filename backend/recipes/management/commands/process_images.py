@@ -0,0 +1,45 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from recipes.images import claim_jobs, process_job
+
+
+class Command(BaseCommand):
+    help = "Обрабатывает очередь изображений: проверка, сжатие, превью."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--sleep", type=float, default=2.0)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Обработать очередь и завершиться.",
+        )
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(
+            max_workers=max(1, options["workers"]),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            while True:
+                job_ids = claim_jobs(options["batch_size"])
+                if not job_ids:
+                    if options["once"]:
+                        break
+                    connections.close_all()
+                    time.sleep(options["sleep"])
+                    continue
+                statuses = list(executor.map(process_job, job_ids))
+                self.stdout.write(
+                    f"Обработано: {statuses.count('done')}, "
+                    f"с ошибкой: {statuses.count('failed')}"
+                )
+        self.stdout.write(self.style.SUCCESS("Очередь изображений пуста."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import ShoppingCart, ShoppingListItem
+from recipes.shopping_lists import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сводные списки покупок по корзинам."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="Id пользователя; по умолчанию — все.",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"]:
+            user_ids = sorted(set(options["users"]))
+        else:
+            user_ids = sorted(
+                set(
+                    ShoppingCart.objects.values_list("user_id", flat=True)
+                ).union(
+                    ShoppingListItem.objects.values_list("user_id", flat=True)
+                )
+            )
+        batch_size = options["batch_size"]
+        for start in range(0, len(user_ids), batch_size):
+            with transaction.atomic():
+                rebuild_shopping_lists(user_ids[start:start + batch_size])
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитано списков: {len(user_ids)}")
+        )
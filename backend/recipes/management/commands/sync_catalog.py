@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.catalog import CATALOGS, CatalogSync, read_rows
+
+DATA_DIR = settings.BASE_DIR / "data"
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает справочник ингредиентов или тегов из CSV или NDJSON: "
+        "добавляет новые записи и обновляет изменённые."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("catalog", choices=CATALOGS)
+        parser.add_argument(
+            "path",
+            nargs="?",
+            help="Файл справочника; по умолчанию data/<справочник>.csv.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=("csv", "ndjson"),
+            help="Формат файла; по умолчанию определяется по расширению.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать изменения, ничего не записывая.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"] or self.find_default(options["catalog"])
+        file_format = options["format"] or (
+            "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+        )
+        sync = CatalogSync(
+            options["catalog"],
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
+        try:
+            with open(path, encoding="utf-8", newline="") as file:
+                stats = sync.run(read_rows(file, file_format, sync.fields))
+        except FileNotFoundError:
+            raise CommandError(f"Файл не найден: {path}")
+        except ValueError as error:
+            raise CommandError(f"Не удалось прочитать {path}: {error}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Добавлено: {stats['inserted']}, "
+                f"обновлено: {stats['updated']}, "
+                f"без изменений: {stats['unchanged']}, "
+                f"пропущено: {stats['skipped']}"
+                + (" (пробный запуск)" if options["dry_run"] else "")
+            )
+        )
+
+    @staticmethod
+    def find_default(catalog):
+        return str(DATA_DIR / f"{catalog}.csv")
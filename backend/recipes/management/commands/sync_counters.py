@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from user.models import CustomUser
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+COUNTERS = (
+    (
+        Recipe,
+        {
+            "favorites_count": (Favorite, "recipe"),
+            "in_carts_count": (ShoppingCart, "recipe"),
+        },
+    ),
+    (CustomUser, {"recipes_count": (Recipe, "author")}),
+)
+
+
+class Command(BaseCommand):
+    help = "Сверяет счётчики избранного, корзин и рецептов с данными."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        for model, counters in COUNTERS:
+            fixed = 0
+            expressions = {
+                field: count_subquery(*source)
+                for field, source in counters.items()
+            }
+            drift = Q()
+            for field in counters:
+                drift |= ~Q(**{field: F(f"actual_{field}")})
+            last_pk = 0
+            while True:
+                pks = list(
+                    model.objects.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[:batch_size]
+                )
+                if not pks:
+                    break
+                last_pk = pks[-1]
+                drifted = list(
+                    model.objects.filter(pk__in=pks)
+                    .annotate(
+                        **{
+                            f"actual_{field}": expression
+                            for field, expression in expressions.items()
+                        }
+                    )
+                    .filter(drift)
+                    .values_list("pk", flat=True)
+                )
+                if drifted:
+                    fixed += model.objects.filter(pk__in=drifted).update(
+                        **expressions
+                    )
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: исправлено {fixed}"
+            )
+        self.stdout.write(self.style.SUCCESS("Счётчики сверены."))
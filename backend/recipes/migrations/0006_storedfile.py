@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0005_image_pipeline"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredFile",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Файл",
+                    ),
+                ),
+                (
+                    "ref_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Число ссылок"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Обновлён"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Файл",
+                "verbose_name_plural": "Файлы",
+                "indexes": [
+                    models.Index(
+                        fields=["ref_count", "updated_at"],
+                        name="stored_file_unused_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0007_upload"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShoppingListItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.BigIntegerField(verbose_name="Количество")),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="recipes.ingredient",
+                        verbose_name="Ингредиент",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_list",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Строка списка покупок",
+                "verbose_name_plural": "Списки покупок",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="shoppinglistitem",
+            constraint=models.UniqueConstraint(
+                fields=("user", "ingredient"),
+                name="unique_user_ingredient_shopping_list",
+            ),
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO recipes_shoppinglistitem
+                (user_id, ingredient_id, amount)
+            SELECT cart.user_id, item.ingredient_id, SUM(item.amount)
+            FROM recipes_shoppingcart cart
+            JOIN recipes_ingredientinrecipe item
+                ON item.recipe_id = cart.recipe_id
+            GROUP BY cart.user_id, item.ingredient_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
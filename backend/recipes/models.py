@@ -1,4 +1,10 @@
+import uuid
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from user.models import CustomUser
@@ -42,6 +48,12 @@ class Recipe(models.Model):
         upload_to="recipes/images/",
         verbose_name="Фото",
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Уменьшенные копии фото",
+    )
     text = models.TextField(
         verbose_name="Описание рецепта",
     )
@@ -59,10 +71,36 @@ class Recipe(models.Model):
         null=True,
         blank=True,
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Добавлений в избранное",
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Добавлений в список покупок",
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name="Поисковый вектор",
+    )
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            GinIndex(
+                fields=["search_vector"],
+                name="recipe_search_vector_idx",
+            ),
+            GinIndex(
+                fields=["name"],
+                name="recipe_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -183,3 +221,159 @@ class Favorite(models.Model):
         ]
         verbose_name = "Избранное"
         verbose_name_plural = "Избранное"
+
+
+class ImageJob(models.Model):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "В очереди"),
+        (PROCESSING, "Обрабатывается"),
+        (DONE, "Готово"),
+        (FAILED, "Ошибка"),
+    )
+
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        verbose_name="Тип объекта",
+    )
+    object_id = models.PositiveBigIntegerField(verbose_name="Id объекта")
+    field_name = models.CharField(max_length=32, verbose_name="Поле")
+    source = models.CharField(max_length=255, verbose_name="Исходный файл")
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name="Статус",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Попытки",
+    )
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Создана",
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлена")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "field_name", "source"],
+                name="unique_image_job",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["status", "updated_at"],
+                name="image_job_status_idx",
+            )
+        ]
+        verbose_name = "Обработка изображения"
+        verbose_name_plural = "Обработка изображений"
+
+    def __str__(self):
+        return f"{self.source} ({self.get_status_display()})"
+
+
+class StoredFile(models.Model):
+    name = models.CharField(
+        max_length=255,
+        primary_key=True,
+        verbose_name="Файл",
+    )
+    ref_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Число ссылок",
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлён")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["ref_count", "updated_at"],
+                name="stored_file_unused_idx",
+            )
+        ]
+        verbose_name = "Файл"
+        verbose_name_plural = "Файлы"
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+
+class Upload(models.Model):
+    """Файл, загруженный заранее; рецепт или аватар ссылается на него
+    по токену вместо передачи содержимого в base64."""
+
+    TTL = timedelta(hours=24)
+
+    token = models.UUIDField(
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+        verbose_name="Токен",
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="uploads",
+        verbose_name="Пользователь",
+    )
+    file = models.ImageField(
+        upload_to="uploads/",
+        max_length=255,
+        verbose_name="Файл",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name="Загружен",
+    )
+
+    class Meta:
+        verbose_name = "Загрузка"
+        verbose_name_plural = "Загрузки"
+
+    def __str__(self):
+        return str(self.token)
+
+
+class ShoppingListItem(models.Model):
+    """Сводное количество ингредиента по всем рецептам в корзине.
+
+    Обновляется вместе с корзиной и ингредиентами рецептов
+    (``recipes.shopping_lists``); пересчитывается командой
+    ``rebuild_shopping_lists``.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_list",
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Ингредиент",
+    )
+    amount = models.BigIntegerField(verbose_name="Количество")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="unique_user_ingredient_shopping_list",
+            )
+        ]
+        verbose_name = "Строка списка покупок"
+        verbose_name_plural = "Списки покупок"
+
+    def __str__(self):
+        return f"{self.ingredient} — {self.amount}"
@@ -0,0 +1,84 @@
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from recipes.counters import change_counter
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.shopping_lists import change_shopping_list
+
+RECIPE_COUNTERS = {
+    Favorite: "favorites_count",
+    ShoppingCart: "in_carts_count",
+}
+
+
+def add_relations(model, user_id, target_field, target_ids):
+    """Связывает пользователя с рецептами или авторами одним запросом.
+
+    ``INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING`` вставляет
+    строки только для существующих целей, с которыми связи ещё нет.
+    Возвращает множество id целей, для которых строка добавлена.
+    """
+    quote = connection.ops.quote_name
+    meta = model._meta
+    target = meta.get_field(target_field)
+    target_meta = target.related_model._meta
+    placeholders = ", ".join(["%s"] * len(target_ids))
+    sql = (
+        f"INSERT INTO {quote(meta.db_table)} "
+        f"({quote(meta.get_field('user').column)}, {quote(target.column)}) "
+        f"SELECT %s, {quote(target_meta.pk.column)} "
+        f"FROM {quote(target_meta.db_table)} "
+        f"WHERE {quote(target_meta.pk.column)} IN ({placeholders}) "
+        f"ON CONFLICT DO NOTHING RETURNING {quote(target.column)}"
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, *target_ids])
+            added = {row[0] for row in cursor.fetchall()}
+        if added and model in RECIPE_COUNTERS:
+            change_counter(Recipe, list(added), RECIPE_COUNTERS[model], 1)
+        if model is ShoppingCart:
+            change_shopping_list(user_id, list(added), 1)
+    return added
+
+
+def remove_relations(model, user_id, target_field, target_ids):
+    """Удаляет связи одним ``DELETE``; возвращает id целей удалённых строк."""
+    quote = connection.ops.quote_name
+    meta = model._meta
+    target_column = quote(meta.get_field(target_field).column)
+    placeholders = ", ".join(["%s"] * len(target_ids))
+    sql = (
+        f"DELETE FROM {quote(meta.db_table)} "
+        f"WHERE {quote(meta.get_field('user').column)} = %s "
+        f"AND {target_column} IN ({placeholders}) "
+        f"RETURNING {target_column}"
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, *target_ids])
+            removed = {row[0] for row in cursor.fetchall()}
+        if removed and model in RECIPE_COUNTERS:
+            change_counter(Recipe, list(removed), RECIPE_COUNTERS[model], -1)
+        if model is ShoppingCart:
+            change_shopping_list(user_id, list(removed), -1)
+    return removed
+
+
+def add_relation(model, user_id, target_field, target_id):
+    return bool(add_relations(model, user_id, target_field, [target_id]))
+
+
+def remove_relation(model, user_id, target_field, target_id):
+    return bool(remove_relations(model, user_id, target_field, [target_id]))
+
+
+def delete_relations(model, queryset):
+    """Удаляет строки избранного или корзины из ``queryset`` с учётом
+    счётчиков и списков покупок."""
+    recipe_ids = defaultdict(list)
+    for user_id, recipe_id in queryset.values_list("user_id", "recipe_id"):
+        recipe_ids[user_id].append(recipe_id)
+    for user_id, ids in recipe_ids.items():
+        remove_relations(model, user_id, "recipe", ids)
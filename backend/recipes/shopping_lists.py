@@ -0,0 +1,89 @@
+"""Сводные списки покупок (``ShoppingListItem``).
+
+Списки меняются приращениями одним ``INSERT ... ON CONFLICT DO
+UPDATE``: рецепт, добавленный в корзину, прибавляет свои ингредиенты,
+удалённый — вычитает, а правка ингредиентов рецепта меняет списки
+всех, у кого он в корзине. Строки с нулевым количеством удаляются.
+"""
+from django.db import connection
+
+from recipes.models import IngredientInRecipe, ShoppingCart, ShoppingListItem
+
+
+def table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def upsert(select, params):
+    """Прибавляет к спискам строки ``(user_id, ingredient_id, amount)``,
+    которые возвращает ``select``."""
+    items = table(ShoppingListItem)
+    sql = (
+        f"INSERT INTO {items} (user_id, ingredient_id, amount) {select} "
+        "ON CONFLICT (user_id, ingredient_id) DO UPDATE "
+        f"SET amount = {items}.amount + EXCLUDED.amount"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def prune(user_ids):
+    ShoppingListItem.objects.filter(
+        user_id__in=user_ids, amount__lte=0
+    ).delete()
+
+
+def change_shopping_list(user_id, recipe_ids, sign):
+    """Прибавляет (``sign=1``) или вычитает (``sign=-1``) ингредиенты
+    рецептов из списка пользователя."""
+    if not recipe_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(recipe_ids))
+    upsert(
+        f"SELECT %s, ingredient_id, %s * SUM(amount) "
+        f"FROM {table(IngredientInRecipe)} "
+        f"WHERE recipe_id IN ({placeholders}) "
+        "GROUP BY ingredient_id",
+        [user_id, sign, *recipe_ids],
+    )
+    if sign < 0:
+        prune([user_id])
+
+
+def change_recipe_ingredients(recipe_id, deltas):
+    """Применяет изменения ингредиентов рецепта ``{ingredient_id:
+    разница}`` к спискам всех, у кого рецепт в корзине."""
+    deltas = [(pk, delta) for pk, delta in deltas.items() if delta]
+    if not deltas:
+        return
+    values = ", ".join(["(%s, %s)"] * len(deltas))
+    upsert(
+        "SELECT cart.user_id, delta.column1, delta.column2 "
+        f"FROM {table(ShoppingCart)} cart, (VALUES {values}) delta "
+        "WHERE cart.recipe_id = %s",
+        [value for pair in deltas for value in pair] + [recipe_id],
+    )
+    if any(delta < 0 for _, delta in deltas):
+        prune(
+            ShoppingCart.objects.filter(recipe_id=recipe_id).values(
+                "user_id"
+            )
+        )
+
+
+def rebuild_shopping_lists(user_ids):
+    """Пересчитывает списки пользователей по их корзинам."""
+    ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table(ShoppingListItem)} "
+            "(user_id, ingredient_id, amount) "
+            "SELECT cart.user_id, item.ingredient_id, SUM(item.amount) "
+            f"FROM {table(ShoppingCart)} cart "
+            f"JOIN {table(IngredientInRecipe)} item "
+            "ON item.recipe_id = cart.recipe_id "
+            f"WHERE cart.user_id IN ({placeholders}) "
+            "GROUP BY cart.user_id, item.ingredient_id",
+            list(user_ids),
+        )
@@ -0,0 +1,129 @@
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from recipes.counters import change_counter, change_file_refs
+from recipes.images import enqueue_image, variant_files
+from recipes.models import Favorite, Recipe, ShoppingCart, Upload
+from recipes.relations import RECIPE_COUNTERS
+from recipes.shopping_lists import (
+    change_recipe_ingredients,
+    change_shopping_list,
+)
+from user.models import CustomUser
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(CustomUser, instance.author_id, "recipes_count", 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(CustomUser, instance.author_id, "recipes_count", -1)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, "favorites_count", 1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def cart_item_added(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, "in_carts_count", 1)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_list_added(sender, instance, created, **kwargs):
+    if created:
+        change_shopping_list(instance.user_id, [instance.recipe_id], 1)
+
+
+# У Favorite и ShoppingCart нет обработчиков удаления, чтобы каскад
+# от рецепта или пользователя удалял их одним DELETE, не загружая строки.
+# Явные удаления идут через recipes.relations.remove_relations.
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_removed_from_carts(sender, instance, **kwargs):
+    # До удаления: ингредиенты рецепта и корзины ещё на месте.
+    amounts = instance.recipe_ingredients.values_list(
+        "ingredient_id", "amount"
+    )
+    change_recipe_ingredients(
+        instance.pk,
+        {ingredient_id: -amount for ingredient_id, amount in amounts},
+    )
+
+
+@receiver(pre_delete, sender=CustomUser)
+def user_relations_removed(sender, instance, **kwargs):
+    # Один UPDATE на счётчик вместо запроса на каждую строку.
+    for model, field in RECIPE_COUNTERS.items():
+        change_counter(
+            Recipe,
+            model.objects.filter(user_id=instance.pk).values("recipe_id"),
+            field,
+            -1,
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    enqueue_image(instance, "image")
+
+
+@receiver(post_save, sender=CustomUser)
+def avatar_saved(sender, instance, **kwargs):
+    enqueue_image(instance, "avatar")
+
+
+IMAGE_FIELDS = {Recipe: "image", CustomUser: "avatar", Upload: "file"}
+
+
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=CustomUser)
+@receiver(pre_save, sender=Upload)
+def remember_stored_image(sender, instance, update_fields=None, **kwargs):
+    field_name = IMAGE_FIELDS[sender]
+    if instance._state.adding:
+        instance._stored_image = ""
+    elif update_fields is None or field_name in update_fields:
+        instance._stored_image = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list(field_name, flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=Upload)
+def count_stored_image(sender, instance, **kwargs):
+    if not hasattr(instance, "_stored_image"):
+        return
+    previous = instance._stored_image
+    del instance._stored_image
+    current = getattr(instance, IMAGE_FIELDS[sender]).name
+    if previous != current:
+        change_file_refs([current], 1)
+        change_file_refs([previous], -1)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_delete, sender=Upload)
+def release_stored_image(sender, instance, **kwargs):
+    field_name = IMAGE_FIELDS[sender]
+    change_file_refs(
+        [getattr(instance, field_name).name]
+        + variant_files(getattr(instance, f"{field_name}_variants", None)),
+        -1,
+    )
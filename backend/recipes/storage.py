@@ -0,0 +1,73 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, в котором имя файла — SHA-256 его содержимого.
+
+    Файл ``recipes/images/photo.jpg`` сохраняется как
+    ``recipes/images/ab/<хеш>.jpg``. Если такой файл уже есть, он не
+    перезаписывается, поэтому URL каждого файла неизменяем. Файл, на
+    который ещё ссылаются (``StoredFile.ref_count``), не удаляется.
+    """
+
+    def delete(self, name):
+        from recipes.models import StoredFile
+
+        if StoredFile.objects.filter(pk=name, ref_count__gt=0).exists():
+            return
+        super().delete(name)
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        name = os.path.join(
+            os.path.dirname(name), digest[:2], f"{digest}{extension}"
+        )
+        path = self.path(name)
+        if not self.exists(name):
+            self.write_new(path, content)
+        # Обновляем время изменения, чтобы сборщик не удалил файл,
+        # на который вот-вот появится ссылка.
+        os.utime(path)
+        return name
+
+    def write_new(self, path, content):
+        """Пишет файл во временный и ссылается на него под именем ``path``.
+
+        ``os.link`` не перезаписывает существующий файл: если тот же
+        файл параллельно сохранил другой процесс, остаётся его копия, а
+        имя по-прежнему равно хешу (``FileSystemStorage`` добавил бы
+        суффикс).
+        """
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            if self.directory_permissions_mode is not None:
+                os.chmod(directory, self.directory_permissions_mode)
+        with tempfile.NamedTemporaryFile(
+            dir=directory, prefix=".upload-", delete=False
+        ) as file:
+            for chunk in content.chunks():
+                file.write(chunk)
+        try:
+            # Временный файл создаётся с правами 0600, а файл должен
+            # читать веб-сервер.
+            os.chmod(
+                file.name,
+                0o644
+                if self.file_permissions_mode is None
+                else self.file_permissions_mode,
+            )
+            try:
+                os.link(file.name, path)
+            except FileExistsError:
+                pass
+        finally:
+            os.unlink(file.name)
@@ -0,0 +1,199 @@
+"""Генерация синтетических данных для нагрузочного тестирования.
+
+Каждый пакет строится собственным генератором случайных чисел,
+зависящим только от зерна, этапа и номера пакета, поэтому при том же
+зерне набор данных один и тот же при любом числе процессов.
+"""
+import io
+import random
+from bisect import bisect_left
+from itertools import accumulate
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from recipes.counters import change_file_refs, track_unused_files
+from recipes.images import SANITIZED_FILENAME, build_variants, variant_files
+from recipes.models import (
+    Favorite,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Subscription,
+)
+from user.models import CustomUser
+
+EMAIL_DOMAIN = "synthetic.test"
+FIRST_NAMES = ("Анна", "Иван", "Мария", "Олег", "Софья", "Пётр", "Елена")
+LAST_NAMES = ("Иванов", "Смирнов", "Кузнецов", "Попов", "Соколов", "Орлов")
+DISHES = ("Салат", "Суп", "Рагу", "Пирог", "Запеканка", "Паста", "Каша")
+
+context = {}
+
+
+class PowerLaw:
+    """Выбор элементов по закону Ципфа: ``i``-й по популярности (с
+    единицы) выпадает с весом ``1 / i ** exponent``.
+
+    Порядок популярности — перестановка ``items``, заданная ``seed``.
+    """
+
+    def __init__(self, items, exponent, seed):
+        self.items = list(items)
+        random.Random(seed).shuffle(self.items)
+        self.cum_weights = list(
+            accumulate(
+                1 / rank**exponent for rank in range(1, len(items) + 1)
+            )
+        )
+
+    def choice(self, rng):
+        point = rng.random() * self.cum_weights[-1]
+        return self.items[bisect_left(self.cum_weights, point)]
+
+    def sample(self, rng, count):
+        """До ``count`` различных элементов."""
+        return list(dict.fromkeys(self.choice(rng) for _ in range(count)))
+
+
+def heavy_tail(rng, alpha, limit):
+    """Число от 0 до ``limit`` с распределением Парето: большинству
+    достаётся мало, немногим — очень много."""
+    return min(limit, int(rng.paretovariate(alpha)) - 1)
+
+
+def batch_rng(seed, stage, number):
+    return random.Random(f"{seed}:{stage}:{number}")
+
+
+def placeholder_image():
+    """Общее изображение рецептов, сразу обработанное, как это сделала
+    бы очередь: ``bulk_create`` не вызывает сигналы и задач не ставит.
+
+    Возвращает значение ``image_variants``; его ``source`` — очищенная
+    копия для поля ``image``. Исходник никому не нужен, и его удалит
+    ``collect_media``.
+    """
+    buffer = io.BytesIO()
+    Image.new("RGB", (960, 640), (222, 184, 135)).save(buffer, "JPEG")
+    source = default_storage.save(
+        "recipes/images/synthetic.jpg", ContentFile(buffer.getvalue())
+    )
+    variants = build_variants(
+        source,
+        default_storage,
+        Recipe._meta.get_field("image").generate_filename(
+            None, SANITIZED_FILENAME
+        ),
+    )
+    track_unused_files([source])
+    return variants
+
+
+def configure(options):
+    """Готовит распределения для пакетов текущего процесса."""
+    context.clear()
+    context.update(options)
+    seed = options["seed"]
+    if "user_ids" in options:
+        context["authors"] = PowerLaw(options["user_ids"], 1.1, seed)
+    if "ingredients" in options:
+        context["ingredients"] = PowerLaw(options["ingredients"], 1.0, seed)
+    if "recipe_ids" in options:
+        context["recipes"] = PowerLaw(options["recipe_ids"], 0.9, seed)
+
+
+def create_users(task):
+    number, start, count = task
+    rng = batch_rng(context["seed"], "users", number)
+    users = CustomUser.objects.bulk_create(
+        [
+            CustomUser(
+                email=f"user{index}@{EMAIL_DOMAIN}",
+                username=f"user{index}",
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                password=context["password"],
+            )
+            for index in range(start, start + count)
+        ]
+    )
+    return [user.pk for user in users]
+
+
+def create_recipes(task):
+    number, start, count = task
+    rng = batch_rng(context["seed"], "recipes", number)
+    recipes = []
+    ingredients = []
+    for index in range(start, start + count):
+        chosen = context["ingredients"].sample(rng, rng.randint(3, 12))
+        recipes.append(
+            Recipe(
+                author_id=context["authors"].choice(rng),
+                name=f"{rng.choice(DISHES)}: {chosen[0][1]} №{index}",
+                text=", ".join(name for _, name in chosen),
+                image=context["image"]["source"],
+                image_variants=context["image"],
+                cooking_time=max(1, int(rng.lognormvariate(3.4, 0.6))),
+            )
+        )
+        ingredients.append(chosen)
+    recipes = Recipe.objects.bulk_create(recipes)
+    change_file_refs(
+        [context["image"]["source"], *variant_files(context["image"])],
+        len(recipes),
+    )
+    Recipe.tags.through.objects.bulk_create(
+        [
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe in recipes
+            for tag_id in rng.sample(
+                context["tag_ids"],
+                min(len(context["tag_ids"]), rng.randint(1, 3)),
+            )
+        ]
+    )
+    IngredientInRecipe.objects.bulk_create(
+        [
+            IngredientInRecipe(
+                recipe_id=recipe.pk,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe, chosen in zip(recipes, ingredients)
+            for ingredient_id, _ in chosen
+        ]
+    )
+    return [recipe.pk for recipe in recipes]
+
+
+def create_relations(task):
+    number, user_ids = task
+    rng = batch_rng(context["seed"], "relations", number)
+    favorites, cart, subscriptions = [], [], []
+    for user_id in user_ids:
+        favorites.extend(
+            Favorite(user_id=user_id, recipe_id=recipe_id)
+            for recipe_id in context["recipes"].sample(
+                rng, heavy_tail(rng, 1.2, 1000)
+            )
+        )
+        cart.extend(
+            ShoppingCart(user_id=user_id, recipe_id=recipe_id)
+            for recipe_id in context["recipes"].sample(
+                rng, heavy_tail(rng, 1.5, 50)
+            )
+        )
+        subscriptions.extend(
+            Subscription(user_id=user_id, author_id=author_id)
+            for author_id in context["authors"].sample(
+                rng, heavy_tail(rng, 1.3, 500)
+            )
+            if author_id != user_id
+        )
+    Favorite.objects.bulk_create(favorites)
+    ShoppingCart.objects.bulk_create(cart)
+    Subscription.objects.bulk_create(subscriptions)
+    return len(favorites), len(cart), len(subscriptions)
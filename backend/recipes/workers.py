@@ -0,0 +1,14 @@
+import django
+from django.utils.module_loading import import_string
+
+
+def setup_worker(configure=None, *args):
+    """Инициализатор процесса пула: настраивает Django и вызывает
+    ``configure``.
+
+    Функция передаётся строкой: модули с моделями можно импортировать
+    только после ``django.setup()``.
+    """
+    django.setup()
+    if configure is not None:
+        import_string(configure)(*args)
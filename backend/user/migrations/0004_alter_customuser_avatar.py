@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0003_customuser_avatar_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="customuser",
+            name="avatar",
+            field=models.ImageField(
+                blank=True,
+                max_length=255,
+                null=True,
+                upload_to="images/avatar/",
+                verbose_name="Аватар",
+            ),
+        ),
+    ]
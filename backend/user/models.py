@@ -10,12 +10,23 @@ class CustomUser(AbstractUser):
         null=False,
     )
     avatar = models.ImageField(
-        upload_to="images/avatar/%Y/%m/%d",
+        upload_to="images/avatar/",
         verbose_name="Аватар",
         null=True,
         blank=True,
         max_length=255,
     )
+    avatar_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Уменьшенные копии аватара",
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество рецептов",
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]